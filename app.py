@@ -1,186 +1,76 @@
-import datetime
+import hashlib
+import json
 import os
 import subprocess
+import threading
+import time
 from pathlib import Path
-import dash_mantine_components as dmc
 import dash_bootstrap_components as dbc
-import pandas as pd
-from dash import ALL, Dash, Input, Output, State, callback_context, dcc, html
+from flask import abort, send_from_directory
+from dash import ALL, ClientsideFunction, Dash, Input, Patch, Output, State, callback_context, dcc, html, no_update
 from dash.exceptions import PreventUpdate
 from icons import icons
-import re
-from collections import defaultdict
+from icon_resolver import icon_file_name, icon_resolver
+from git_status import cached_snapshot, invalidate_snapshot
+import listing
+from listing import invalidate_listing, listing_page, progressive_listing
+from repo_index import find_repo_root, repo_index
+from repo_state import repo_state
+from sprite import SPRITE_MAX_AGE, load_sprite, symbol_id
+from compression import compressor
+from collections import OrderedDict
 import tkinter as tk
 
 
-def icon_file(extension, width=24, height=24):
-    """Retrun an html.img of the svg icon for a given extension."""
-    filetype = icons.get(extension)
-    file_name = f'file_type_{filetype}.svg' if filetype is not None else 'default_file.svg'
-    html_tag = html.Img(src=app.get_asset_url(f'icons/{file_name}'),
-                        width=width, height=height)
-    return html_tag
-
-
-def nowtimestamp(timestamp, fmt='%b %d, %Y %H:%M'):
-    return datetime.datetime.fromtimestamp(timestamp).strftime(fmt)
-
-
-# directory의 status를 return
-# status기준 ==> committed를 제외한 상태를 바탕으로, 개수가 가장 제일 많은 것을 return
-# ex) untracked 3개, modified 2개, staged 1개 --> untracked를 return
-def directory_status(filename):
-    git_status = subprocess.run(['git', 'status', '--porcelain', filename], stdout=subprocess.PIPE).stdout.decode(
-        'utf-8')
-    data = git_status.split()
-    dic = defaultdict(int)
-    if not data:
-        return 'committed'
-    for i in range(1, len(data), 2):
-        dic[get_git_file_status(data[i])] += 1
-    result = sorted(dic.items(), key=lambda x: -x[1])
-    return result[0][:-1]
-
-
-# git status: 파일 상태를 확인
-def get_git_file_status(filename):
-    # Git의 status 명령을 실행하고 출력 결과를 파싱
-    git_status = subprocess.run(['git', 'status', '--porcelain', filename], stdout=subprocess.PIPE).stdout.decode(
-        'utf-8')
-    committed = subprocess.run(['git', 'status', '--porcelain', filename], stdout=subprocess.PIPE)
-    parse = git_status.split('\n')
-    if len(parse) >= 3:
-        for p in parse:
-            if len(p) > 0:
-                if p[0:2] == '??':
-                    return '*?'
-                elif p[0:2] == '!!':
-                    return '*!'
-        return '**'
-    elif len(git_status) == 0:
-        return ''
-    else:
-        return git_status[0:2]
-    """if len(parse) >= 3:
-        return '??'
-    elif git_status.startswith('??'):
-        # 파일이 Git 저장소에 추가되지 않았음
-        return 'untracked'
-    elif git_status.startswith('MM') or git_status.startswith('AM'):
-        return 'modified'
-    elif git_status.startswith('A '):
-        # 파일이 추가되어 staging area에 있음
-        return 'staged'
-    elif git_status.startswith('M '):
-        # 파일이 수정되어 staging area에 있음.
-        return 'staged'
-    elif git_status.startswith(' M'):
-        return 'modified'
-    else:
-        return 'committed'"""
-
-
-def get_git_status_meaning(filename):
-    git_status = subprocess.run(['git', 'status', '--porcelain', filename], stdout=subprocess.PIPE).stdout.decode(
-        'utf-8')
-    parse = git_status.split('\n')
-    status = []
-    meaning = []
-    for p in parse:
-        status.append(p[:2])
-    for s in status:
-        if re.match(' [AMD]', s):
-            meaning.append("not updated")  # not staged
-        elif re.match('M[ MTD]', s):
-            meaning.append("staged: updated in index")
-        elif re.match('T[ MTD]', s):
-            meaning.append("staged: type change in index")
-        elif re.match('A[ MTD]', s):
-            meaning.append("staged: added to index")
-        elif s == "D ":
-            meaning.append("staged: deleted from index")
-        elif re.match('R[ MTD]', s):
-            meaning.append("staged: renamed in index")
-        elif re.match('C[ MTD]', s):
-            meaning.append("staged: copied in index")
-
-        if re.match('[MTARC] ', s):
-            meaning.append("index and work tree matches")
-        elif re.match('[ MTARC]M', s):
-            meaning.append("modified in work tree since index")
-        elif re.match('[ MTARC]T', s):
-            meaning.append("type changed in work tree since index")
-        elif re.match('[ MTARC]D', s):
-            meaning.append("deleted from index")
-        elif s == " R":
-            meaning.append("renamed in work tree")
-        elif s == " C":
-            meaning.append("copied in index")
-
-        '''if s == "DD":
-            meaning.append("unmerged, both deleted")
-        elif s == "AU":
-            meaning.append("unmerged, added by us")
-        elif s == "UD":
-            meaning.append("unmerged, deleted by them")
-        elif s == "UA":
-            meaning.append("unmerged, added by them")
-        elif s == "DU":
-            meaning.append("unmerged, deleted by us")
-        elif s == "AA":
-            meaning.append("unmerged, both added")
-        elif s == "UU":
-            meaning.append("unmerged, both modified")
-            '''
-        if s == "??":
-            meaning.append("untracked")
-        elif s == "!!":
-            meaning.append("ignored")
-    return meaning
-
-
-def file_info(path):
-    """Get file info for a given path.
-
-    Uncomment the attributes that you want to display.
-
-    Parameters:
-    -----------
-    path : pathlib.Path object
-    """
-    file_stat = path.stat()
-    d = {
-        'chbox': False,
-        'extension': path.suffix if not path.name.startswith('.') else path.name,
-        'filename': path.name,
-        # 'fullpath': str(path.absolute()),
-        'size': format(file_stat.st_size, ','),
-        'created': nowtimestamp(file_stat.st_ctime),
-        'modified': nowtimestamp(file_stat.st_mtime),
-        # 'accessed': nowtimestamp(file_stat.st_atime),
-        # 'is_dir': str(path.is_dir()),
-        # 'is_file': str(path.is_file()),
-    }
-    return d
+def icon_name(extension):
+    """Return the file name of the svg icon for a given extension."""
+    return icon_file_name(icons.get(extension))
+
+
+def get_git_status_meaning(filename, snapshot):
+    return snapshot.status_meaning(filename)
 
 
 # git repository
+# repo_index에서 .git 위치를 찾음 (git status를 실행하지 않음)
 def is_git_repo(path):
     if not os.path.isdir(path):
         return False
-    os.chdir(path)
-    if os.path.isdir(".git"):
-        return True
-    try:
-        result = subprocess.run(['git', 'status'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        output = result.stderr.decode('utf-8')
-        # git_status = os.popen("git status").read()
-        if "fatal" in output.lower():
-            return False
-        else:
-            return True
-    except:
-        return False
+    return repo_index.repo_for(path) is not None
+
+
+# git 명령은 항상 cwd를 지정해서 실행 (프로세스의 작업 디렉토리는 바꾸지 않음)
+# 여러 요청이 동시에 다른 repository를 다뤄도 서로 영향을 주지 않음
+def run_git(args, cwd, **kwargs):
+    kwargs.setdefault('stdout', subprocess.PIPE)
+    kwargs.setdefault('stderr', subprocess.PIPE)
+    return subprocess.run(['git'] + args, cwd=cwd, **kwargs)
+
+
+# 선택한 파일들을 한 번의 git 명령으로 처리 (shell 없이, NUL로 구분한 pathspec을 stdin으로 전달)
+# 파일별 상태 변화(before -> after)와 전체 걸린 시간을 표시할 html.Div를 return
+def git_batch(args, files, cwd):
+    start = time.perf_counter()
+    before = cached_snapshot(cwd)
+    result = run_git(['--literal-pathspecs'] + args + ['--pathspec-from-file=-', '--pathspec-file-nul'], cwd,
+                     input=b'\0'.join(os.fsencode(file) for file in files))
+    invalidate_snapshot(cwd)
+    invalidate_listing(cwd)
+    after = cached_snapshot(cwd)
+    elapsed = time.perf_counter() - start
+
+    def code(snapshot, file):
+        if snapshot is None:
+            return ''
+        return snapshot.file_status(os.path.join(cwd, file)) or 'committed'
+
+    summary = f"git {' '.join(args)}: {len(files)} file(s) in {elapsed:.2f}s"
+    if result.returncode != 0:
+        return html.Div([html.B(summary), html.Pre(result.stderr.decode('utf-8', 'replace'))])
+    items = [html.Li(f'{file}: {code(before, file)} → {code(after, file)}') for file in files[:50]]
+    if len(files) > 50:
+        items.append(html.Li(f'... and {len(files) - 50} more'))
+    return html.Div([html.B(summary), html.Ul(items)])
 
 
 app = Dash(
@@ -196,6 +86,35 @@ need to manipulate and analyze files on the server."""},
     external_stylesheets=[dbc.themes.FLATLY])
 
 server = app.server
+# icon sprite (sprite.py): 이름에 content hash가 있으므로 browser가 오래 cache해도 됨
+# app directory에 쓸 수 없으면 memory에 있는 sprite를 보냄
+SPRITE = load_sprite()
+SPRITE_URL = app.get_relative_path(f'/sprite/{SPRITE.name}')
+
+
+@server.route('/sprite/<name>')
+def serve_sprite(name):
+    if SPRITE.path is not None:
+        response = send_from_directory(SPRITE.path.parent, name, max_age=SPRITE_MAX_AGE)
+    elif name == SPRITE.name:
+        response = server.response_class(SPRITE.data, mimetype='image/svg+xml')
+        response.cache_control.public = True
+        response.cache_control.max_age = SPRITE_MAX_AGE
+    else:
+        abort(404)
+    response.cache_control.immutable = True
+    return response
+
+
+# 응답 압축 (gzip/brotli), asset과 sprite는 미리 압축한 파일을 보냄, layout 응답에는 ETag
+compressor.init_app(server)
+compressor.static('_dash_assets.static', app.config.assets_folder)
+if SPRITE.path is not None:
+    compressor.static('serve_sprite', SPRITE.path.parent, arg='name')
+
+
+# 시작 디렉토리 주변의 repository를 미리 찾아둠
+repo_index.scan(os.getcwd())
 modal_style = {
     'width': '500px',
     'position': 'fixed',
@@ -206,250 +125,274 @@ modal_style = {
 # branch = []
 
 # button 구현
-app.layout = html.Div([
-                          html.Link(
-                              rel="stylesheet",
-                              href="https://cdnjs.cloudflare.com/ajax/libs/github-fork-ribbon-css/0.2.3/gh-fork-ribbon.min.css"),
-                          html.A(
-                              "Fork me on Github",
-                              className="github-fork-ribbon",
-                              href="https://github.com/eliasdabbas/dash-file-browser",
-                              title="Fork me on GitHub", **{"data-ribbon": "Fork me on GitHub"}),
-                          html.Br(), html.Br(),
-                          dbc.Row([
-                              dbc.Col(lg=1, sm=1, md=1),
-                              dbc.Col([
-                                  dcc.Store(id='stored_cwd', data=os.getcwd()),
-                                  dcc.Store(id='project_dir', data=os.getcwd()),
-                                  html.H1('Dash File Browser'),
-                                  html.Hr(), html.Br(), html.Br(), html.Br(),
-                                  html.H5(html.B(html.A("⬆️ Parent directory", href='#',
-                                                        id='parent_dir'))),
-                                  html.H3([html.Code(os.getcwd(), id='cwd')]),
-                                  html.Br(), html.Br(),
+# 처음 보여줄 directory의 listing과 branch를 layout에 미리 넣음 (page를 열 때마다 호출)
+# browser는 callback을 기다리지 않고 첫 page를 바로 그림
+def serve_layout():
+    cwd = os.getcwd()
+    view = initial_view(cwd)
+    return html.Div([
+                              html.Link(
+                                  rel="stylesheet",
+                                  href="https://cdnjs.cloudflare.com/ajax/libs/github-fork-ribbon-css/0.2.3/gh-fork-ribbon.min.css"),
+                              html.A(
+                                  "Fork me on Github",
+                                  className="github-fork-ribbon",
+                                  href="https://github.com/eliasdabbas/dash-file-browser",
+                                  title="Fork me on GitHub", **{"data-ribbon": "Fork me on GitHub"}),
+                              html.Br(), html.Br(),
+                              dbc.Row([
+                                  dbc.Col(lg=1, sm=1, md=1),
                                   dbc.Col([
-                                      html.Button('branch', id='open-popup-button'),
-                                      html.Button('Commit Graph', id='commit_graph', style={"margin-left": "15px"}),
-                                      dbc.Modal(
-                                          id='popup',
-                                          size='lg',
-                                          # style=modal_style,
-                                          children=[
-                                              html.H5('Branch Action', className='text-center'),
-                                              # dbc.Col([]),
-                                              dbc.Row(
-                                                  html.Div(
-                                                      [
-                                                          dcc.Input(id='branch_name',
-                                                                    style={'width': '150px', 'margin-left': '10px'},
-                                                                    placeholder="input branch name"),
-                                                          dcc.Dropdown(
-                                                              id='branch_dropdown',
-                                                              style={'width': '200px', 'margin-left': '5px'},
-                                                              options=[]),
-                                                          dbc.Button('create', id='create_branch', n_clicks=0,
-                                                                     color='primary',
-                                                                     style={'font_size': '16px', 'margin-left': '8%',
-                                                                            'width': '80px', 'height': '38px'}),
-                                                          dbc.Button('rename', id='rename_branch', n_clicks=0,
-                                                                     color='warning',
-                                                                     style={'font_size': '16px', 'margin-left': '8px',
-                                                                            'width': '80px', 'height': '38px'}),
-                                                          dbc.Button('delete', id='delete_branch', n_clicks=0,
-                                                                     color='danger',
-                                                                     style={'font_size': '16px', 'margin-left': '8px',
-                                                                            'width': '80px', 'height': '38px'}),
-                                                          dbc.Button('checkout', id='checkout_branch', n_clicks=0,
-                                                                     color='light',
-                                                                     style={'font_size': '16px', 'margin-left': '8px',
-                                                                            'width': '90px', 'height': '38px'}),
-                                                      ],
-                                                      className='d-flex align-items-center'
-                                                      # 중앙 정렬
-                                                  )
-                                              ),
-                                              dbc.Button('close', id='close-popup-button',
-                                                         color='secondary',
-                                                         style={'font_size': '16px', 'margin-left': '86%',
-                                                                'margin-top': '5px', 'margin-bottom': '5px',
-                                                                'width': '100px', 'height': '38px'})]),
-                                      html.Button('branch_merge', id='open-popup-button-2',
-                                                  style={"margin-left": "15px"}),
-                                      dbc.Modal(
-                                          id='popup-2',
-                                          children=[
-                                              html.H5('Branch Merge', className='text-center'),
-                                              html.Div(id='current_branch',
-                                                       style={'margin-top': '10px', 'marginLeft': '20px',
-                                                              'fontSize': '18px'}),
-                                              html.Div('✡ Merge할 branch',
-                                                       style={'display': 'inline-block', 'margin-right': '10px',
-                                                              'marginLeft': '20px', 'fontSize': '18px'}),
-                                              dcc.Dropdown(
-                                                  id='branch_dropdown-2',
-                                                  style={'width': '200px', 'marginLeft': '10px', 'margin-top': '5px'},
-                                              ),
-                                              html.Div([
-                                                  dbc.Button('Merge', id='merge_branch', n_clicks=0,
-                                                             color='warning',
-                                                             style={'font_size': '14px', 'margin-left': '60%',
-                                                                    'width': '90px', 'height': '36px',
-                                                                    'margin-bottom': '5px'}
-                                                             ),
-                                                  dbc.Button('close', id='close-popup-button-2',
-                                                             color='secondary',
-                                                             style={'font_size': '14px', 'margin-left': '10px',
-                                                                    'width': '90px', 'height': '36px',
-                                                                    'margin-bottom': '5px'}
-                                                             )
-                                              ])
-                                          ]
-                                      ),
-                                      html.Button('git clone', id='git_clone', n_clicks=0,
-                                                  style={"margin-left": "15px"}),
-                                      dbc.Modal(
-                                          id='modal_clone',
-                                          size='lg',
-                                          children=[
-                                              html.Div(
-                                                  className='modal-content',
-                                                  children=[
-                                                      html.H5('Modal Content', className='text-center'),
-                                                      dcc.RadioItems(
-                                                          id='visibility',
-                                                          options=[
-                                                              {'label': 'Public', 'value': 'public'},
-                                                              {'label': 'Private', 'value': 'private'}
+                                      dcc.Store(id='stored_cwd', data=cwd),
+                                      dcc.Store(id='project_dir', data=cwd),
+                                      html.H1('Dash File Browser'),
+                                      html.Hr(), html.Br(), html.Br(), html.Br(),
+                                      html.H5(html.B(html.A("⬆️ Parent directory", href='#',
+                                                            id='parent_dir'))),
+                                      html.H3([html.Code(cwd, id='cwd')]),
+                                      html.Br(), html.Br(),
+                                      dbc.Col([
+                                          html.Button('branch', id='open-popup-button'),
+                                          html.Button('Commit Graph', id='commit_graph', style={"margin-left": "15px"}),
+                                          dbc.Modal(
+                                              id='popup',
+                                              size='lg',
+                                              # style=modal_style,
+                                              children=[
+                                                  html.H5('Branch Action', className='text-center'),
+                                                  # dbc.Col([]),
+                                                  dbc.Row(
+                                                      html.Div(
+                                                          [
+                                                              dcc.Input(id='branch_name',
+                                                                        style={'width': '150px', 'margin-left': '10px'},
+                                                                        placeholder="input branch name"),
+                                                              dcc.Dropdown(
+                                                                  id='branch_dropdown',
+                                                                  style={'width': '200px', 'margin-left': '5px'},
+                                                                  options=[]),
+                                                              dbc.Button('create', id='create_branch', n_clicks=0,
+                                                                         color='primary',
+                                                                         style={'font_size': '16px', 'margin-left': '8%',
+                                                                                'width': '80px', 'height': '38px'}),
+                                                              dbc.Button('rename', id='rename_branch', n_clicks=0,
+                                                                         color='warning',
+                                                                         style={'font_size': '16px', 'margin-left': '8px',
+                                                                                'width': '80px', 'height': '38px'}),
+                                                              dbc.Button('delete', id='delete_branch', n_clicks=0,
+                                                                         color='danger',
+                                                                         style={'font_size': '16px', 'margin-left': '8px',
+                                                                                'width': '80px', 'height': '38px'}),
+                                                              dbc.Button('checkout', id='checkout_branch', n_clicks=0,
+                                                                         color='light',
+                                                                         style={'font_size': '16px', 'margin-left': '8px',
+                                                                                'width': '90px', 'height': '38px'}),
                                                           ],
-                                                          value='public', inline=True,
-                                                          labelStyle={'display': 'inline-block',
-                                                                      'margin-left': '10px'}
-                                                      ),
-                                                      dcc.Input(
-                                                          id='git_repo_url',
-                                                          placeholder="Paste your Github repo url",
-                                                          type="text",
-                                                          style={'margin-bottom': '5px', 'margin-top': '5px',
-                                                                 'margin-left': '10px', 'margin-right': '10px'}
-                                                      ),
-                                                      dcc.Input(
-                                                          id='git_id',
-                                                          placeholder="Enter your ID",
-                                                          type="text",
-                                                          disabled=True,
-                                                          style={'margin-bottom': '5px', 'margin-top': '5px',
-                                                                 'margin-left': '10px', 'margin-right': '10px'}
-                                                      ),
-                                                      dcc.Input(
-                                                          id='git_token',
-                                                          placeholder="Paste your Github token",
-                                                          type="text",
-                                                          disabled=True,
-                                                          style={'margin-bottom': '5px', 'margin-top': '5px',
-                                                                 'margin-left': '10px', 'margin-right': '10px'}
-                                                      ),
-                                                      dbc.Col([
-                                                          dbc.Button(
-                                                              'Load', id='load_clone',
-                                                              n_clicks=0,
-                                                              color='warning',
-                                                              style={'font-size': '16px', 'margin-left': '62%',
-                                                                     'margin-bottom': '5px',
-                                                                     'width': '90px', 'height': '40px'},
-                                                              disabled=True
+                                                          className='d-flex align-items-center'
+                                                          # 중앙 정렬
+                                                      )
+                                                  ),
+                                                  dbc.Button('close', id='close-popup-button',
+                                                             color='secondary',
+                                                             style={'font_size': '16px', 'margin-left': '86%',
+                                                                    'margin-top': '5px', 'margin-bottom': '5px',
+                                                                    'width': '100px', 'height': '38px'})]),
+                                          html.Button('branch_merge', id='open-popup-button-2',
+                                                      style={"margin-left": "15px"}),
+                                          dbc.Modal(
+                                              id='popup-2',
+                                              children=[
+                                                  html.H5('Branch Merge', className='text-center'),
+                                                  html.Div(id='current_branch',
+                                                           style={'margin-top': '10px', 'marginLeft': '20px',
+                                                                  'fontSize': '18px'}),
+                                                  html.Div('✡ Merge할 branch',
+                                                           style={'display': 'inline-block', 'margin-right': '10px',
+                                                                  'marginLeft': '20px', 'fontSize': '18px'}),
+                                                  dcc.Dropdown(
+                                                      id='branch_dropdown-2',
+                                                      style={'width': '200px', 'marginLeft': '10px', 'margin-top': '5px'},
+                                                  ),
+                                                  html.Div([
+                                                      dbc.Button('Merge', id='merge_branch', n_clicks=0,
+                                                                 color='warning',
+                                                                 style={'font_size': '14px', 'margin-left': '60%',
+                                                                        'width': '90px', 'height': '36px',
+                                                                        'margin-bottom': '5px'}
+                                                                 ),
+                                                      dbc.Button('close', id='close-popup-button-2',
+                                                                 color='secondary',
+                                                                 style={'font_size': '14px', 'margin-left': '10px',
+                                                                        'width': '90px', 'height': '36px',
+                                                                        'margin-bottom': '5px'}
+                                                                 )
+                                                  ])
+                                              ]
+                                          ),
+                                          html.Button('git clone', id='git_clone', n_clicks=0,
+                                                      style={"margin-left": "15px"}),
+                                          dbc.Modal(
+                                              id='modal_clone',
+                                              size='lg',
+                                              children=[
+                                                  html.Div(
+                                                      className='modal-content',
+                                                      children=[
+                                                          html.H5('Modal Content', className='text-center'),
+                                                          dcc.RadioItems(
+                                                              id='visibility',
+                                                              options=[
+                                                                  {'label': 'Public', 'value': 'public'},
+                                                                  {'label': 'Private', 'value': 'private'}
+                                                              ],
+                                                              value='public', inline=True,
+                                                              labelStyle={'display': 'inline-block',
+                                                                          'margin-left': '10px'}
+                                                          ),
+                                                          dcc.Input(
+                                                              id='git_repo_url',
+                                                              placeholder="Paste your Github repo url",
+                                                              type="text",
+                                                              style={'margin-bottom': '5px', 'margin-top': '5px',
+                                                                     'margin-left': '10px', 'margin-right': '10px'}
                                                           ),
-                                                          dbc.Button(
-                                                              'Clone', id='do_clone',
-                                                              n_clicks=0,
-                                                              color='primary',
-                                                              style={'font-size': '16px', 'margin-left': '10px',
-                                                                     'margin-bottom': '5px',
-                                                                     'width': '90px', 'height': '40px'}
+                                                          dcc.Input(
+                                                              id='git_id',
+                                                              placeholder="Enter your ID",
+                                                              type="text",
+                                                              disabled=True,
+                                                              style={'margin-bottom': '5px', 'margin-top': '5px',
+                                                                     'margin-left': '10px', 'margin-right': '10px'}
                                                           ),
-                                                          dbc.Button(
-                                                              'Close', id='close_clone',
-                                                              n_clicks=0,
-                                                              color='secondary',
-                                                              style={'font-size': '16px', 'margin-left': '10px',
-                                                                     'margin-bottom': '5px',
-                                                                     'width': '90px', 'height': '40px'}
-                                                          )])
-                                                  ]
-                                              )
-                                          ]
+                                                          dcc.Input(
+                                                              id='git_token',
+                                                              placeholder="Paste your Github token",
+                                                              type="text",
+                                                              disabled=True,
+                                                              style={'margin-bottom': '5px', 'margin-top': '5px',
+                                                                     'margin-left': '10px', 'margin-right': '10px'}
+                                                          ),
+                                                          dbc.Col([
+                                                              dbc.Button(
+                                                                  'Load', id='load_clone',
+                                                                  n_clicks=0,
+                                                                  color='warning',
+                                                                  style={'font-size': '16px', 'margin-left': '62%',
+                                                                         'margin-bottom': '5px',
+                                                                         'width': '90px', 'height': '40px'},
+                                                                  disabled=True
+                                                              ),
+                                                              dbc.Button(
+                                                                  'Clone', id='do_clone',
+                                                                  n_clicks=0,
+                                                                  color='primary',
+                                                                  style={'font-size': '16px', 'margin-left': '10px',
+                                                                         'margin-bottom': '5px',
+                                                                         'width': '90px', 'height': '40px'}
+                                                              ),
+                                                              dbc.Button(
+                                                                  'Close', id='close_clone',
+                                                                  n_clicks=0,
+                                                                  color='secondary',
+                                                                  style={'font-size': '16px', 'margin-left': '10px',
+                                                                         'margin-bottom': '5px',
+                                                                         'width': '90px', 'height': '40px'}
+                                                              )])
+                                                      ]
+                                                  )
+                                              ]
+                                          ),
+                                      ]),
+                                      html.Button(
+                                          branch_label(view['repo_info']),
+                                          id='currentBranch',
+                                          style={
+                                              # 'padding': '10px',  # 네모칸 안 여백
+                                              'border': '1px solid black',
+                                              'margin-top': '5px',
+                                              'margin-bottom': '5px'
+                                          }),
+                                      html.Br(),
+                                      dbc.Col([html.Button('git init', id={'type': 'git_button', 'index': 1}, n_clicks=0,
+                                                           disabled=False),  # git init button 'gitinit-val'
+                                               # html.Button('not git repo', id={'type': 'git_button', 'index': 2},
+                                               #            disabled=True),  # is git repo button, but disabled 'is_gitrepo'
+                                               html.Button('check', id={'type': 'git_button', 'index': 3}, value='',
+                                                           style={"margin-left": "15px"}),  # 'check'
+                                               html.Button('add', id={'type': 'git_button', 'index': 4}, disabled=True,
+                                                           style={"margin-left": "15px"}),  # 'add'
+                                               html.Button('restore', id={'type': 'git_button', 'index': 5}, disabled=True,
+                                                           style={"margin-left": "15px"}),  # 'restore'
+                                               html.Button('unstaged', id={'type': 'git_button', 'index': 6}, n_clicks=0,
+                                                           disabled=True, style={"margin-left": "15px"}),  # 'unstaged'
+                                               html.Button('untracked', id={'type': 'git_button', 'index': 7},
+                                                           disabled=True, style={"margin-left": "15px"}),  # 'untracked'
+                                               html.Button('delete', id={'type': 'git_button', 'index': 8}, disabled=True,
+                                                           style={"margin-left": "15px"}),  # 'delete'
+                                               dcc.Input(id='rename', placeholder='Enter a name to replace', debounce=True,
+                                                         value='', type='text', style={"margin-left": "15px"}),
+                                               dcc.Store(id='store', data={}),
+                                               html.Button('rename', id={'type': 'git_button', 'index': 9}, disabled=True),
+                                               # 'rename'
+                                               dcc.Input(id='commit', placeholder='Enter a commit message', debounce=True,
+                                                         value='', type='text', style={"margin-left": "15px"}),  # 'commit'
+                                               html.Button('commit', id={'type': 'git_button', 'index': 10}, disabled=False)
+                                               ]),
+                                      dcc.ConfirmDialog(
+                                          id='confirm',
+                                          message='Are you sure you want to delete this item?',
                                       ),
-                                  ]),
-                                  html.Button(
-                                      id='currentBranch',
-                                      style={
-                                          # 'padding': '10px',  # 네모칸 안 여백
-                                          'border': '1px solid black',
-                                          'margin-top': '5px',
-                                          'margin-bottom': '5px'
-                                      }),
-                                  html.Br(),
-                                  dbc.Col([html.Button('git init', id={'type': 'git_button', 'index': 1}, n_clicks=0,
-                                                       disabled=False),  # git init button 'gitinit-val'
-                                           # html.Button('not git repo', id={'type': 'git_button', 'index': 2},
-                                           #            disabled=True),  # is git repo button, but disabled 'is_gitrepo'
-                                           html.Button('check', id={'type': 'git_button', 'index': 3}, value='',
-                                                       style={"margin-left": "15px"}),  # 'check'
-                                           html.Button('add', id={'type': 'git_button', 'index': 4}, disabled=True,
-                                                       style={"margin-left": "15px"}),  # 'add'
-                                           html.Button('restore', id={'type': 'git_button', 'index': 5}, disabled=True,
-                                                       style={"margin-left": "15px"}),  # 'restore'
-                                           html.Button('unstaged', id={'type': 'git_button', 'index': 6}, n_clicks=0,
-                                                       disabled=True, style={"margin-left": "15px"}),  # 'unstaged'
-                                           html.Button('untracked', id={'type': 'git_button', 'index': 7},
-                                                       disabled=True, style={"margin-left": "15px"}),  # 'untracked'
-                                           html.Button('delete', id={'type': 'git_button', 'index': 8}, disabled=True,
-                                                       style={"margin-left": "15px"}),  # 'delete'
-                                           dcc.Input(id='rename', placeholder='Enter a name to replace', debounce=True,
-                                                     value='', type='text', style={"margin-left": "15px"}),
-                                           dcc.Store(id='store', data={}),
-                                           html.Button('rename', id={'type': 'git_button', 'index': 9}, disabled=True),
-                                           # 'rename'
-                                           dcc.Input(id='commit', placeholder='Enter a commit message', debounce=True,
-                                                     value='', type='text', style={"margin-left": "15px"}),  # 'commit'
-                                           html.Button('commit', id={'type': 'git_button', 'index': 10}, disabled=False)
-                                           ]),
-                                  dcc.ConfirmDialog(
-                                      id='confirm',
-                                      message='Are you sure you want to delete this item?',
-                                  ),
-                                  html.Div(id='commit_message'),
-
-                                  html.Div(id='cwd_files',
-                                           style={'height': 500, 'overflow': 'scroll'}),
-                              ], lg=10, sm=11, md=10)
-                          ])
-                      ] + [html.Br() for _ in range(13)] + [html.Div(id='dummy2', n_clicks=0),
-                                                            html.Div(id='dummy3', n_clicks=0),
-                                                            html.Div(id='dummy4', n_clicks=0),
-                                                            html.Div(id='dummy5', n_clicks=0),
-                                                            html.Div(id='dummy6', n_clicks=0),
-                                                            html.Div(id='dummy7', n_clicks=0),
-                                                            html.Div(id='dummy8', n_clicks=0),
-                                                            html.Div(id='dummy9', n_clicks=0),
-                                                            html.Div(id='dummy10', n_clicks=0),
-                                                            html.Div(id='dummy12', n_clicks=0),
-                                                            html.Div(id='dummy13', n_clicks=0),
-                                                            html.Div(id='dummy14', n_clicks=0),
-                                                            html.Div(id='b1', n_clicks=0),  # delete용
-                                                            dbc.Modal(id='delete_popup', children=[], ),
-                                                            html.Div(id='b2', n_clicks=0),  # checkout용
-                                                            dbc.Modal(id='checkout_popup', children=[], ),
-                                                            html.Div(id='dummy11', n_clicks=0),
-                                                            html.Div(id='b3', n_clicks=0),  # checkout용
-                                                            dbc.Modal(id='create_popup', children=[], ),
-                                                            html.Div(id='b4', n_clicks=0),  # checkout용
-                                                            dbc.Modal(id='rename_popup', children=[], ),
-                                                            html.Div(id='m1', n_clicks=0),  # merge용
-                                                            dbc.Modal(id='merge_popup', children=[], ),
-                                                            html.Div(id='c1', n_clicks=0),
-                                                            dbc.Modal(id='load_popup', children=[]),
-                                                            dbc.Modal(id='clone_popup', children=[]),
-                                                            ])
+                                      html.Div(id='commit_message'),
+                                      html.Div(id='action_result'),
+
+                                      # page 이동 (이전/다음, 첫 글자로 이동, page 크기)
+                                      html.Div([
+                                          html.Button('◀ prev', id='page_prev', n_clicks=0),
+                                          html.Button('next ▶', id='page_next', n_clicks=0,
+                                                      style={"margin-left": "5px"}),
+                                          dcc.Dropdown(id='page_size',
+                                                       options=sorted({100, 1000, 10000, 50000, listing.PAGE_SIZE}),
+                                                       value=listing.PAGE_SIZE,
+                                                       clearable=False,
+                                                       style={'width': '90px', 'margin-left': '15px'}),
+                                          html.Span([html.A(letter.upper(), href='#',
+                                                            id={'type': 'page_letter', 'index': letter},
+                                                            style={'margin-left': '6px'})
+                                                     for letter in '#abcdefghijklmnopqrstuvwxyz'],
+                                                    style={'margin-left': '15px'}),
+                                      ], className='d-flex align-items-center', style={'margin-top': '10px'}),
+                                      dcc.Store(id='page', data=view['page']),
+                                      dcc.Store(id='selected', data=[]),
+                                      dcc.Store(id='listing_data', data=view['data']),
+                                      dcc.Store(id='listing_version', data=view['version']),
+                                      # repository가 바뀌면 (git 명령) version이 올라감 -> listing과 button 상태를 다시 계산
+                                      dcc.Store(id='repo_version'),
+                                      dcc.Store(id='repo_info', data=view['repo_info']),
+                                      dcc.Store(id='listing_rendered'),
+
+                                      html.Div(view['info'], id='listing_info'),
+                                      html.Div(id='cwd_files', className='listing-grid',
+                                               style={'height': 500, 'overflow': 'auto'}),
+                                      # 큰 directory를 scan하는 동안 현재 page를 다시 그림
+                                      dcc.Interval(id='scan_poll', interval=500, disabled=view['done']),
+                                  ], lg=10, sm=11, md=10)
+                              ])
+                          ] + [html.Br() for _ in range(13)] + [html.Div(id='dummy3', n_clicks=0),
+                                                                html.Div(id='dummy13', n_clicks=0),
+                                                                html.Div(id='dummy14', n_clicks=0),
+                                                                html.Div(id='b1', n_clicks=0),  # delete용
+                                                                dbc.Modal(id='delete_popup', children=[], ),
+                                                                html.Div(id='b2', n_clicks=0),  # checkout용
+                                                                dbc.Modal(id='checkout_popup', children=[], ),
+                                                                html.Div(id='b3', n_clicks=0),  # checkout용
+                                                                dbc.Modal(id='create_popup', children=[], ),
+                                                                html.Div(id='b4', n_clicks=0),  # checkout용
+                                                                dbc.Modal(id='rename_popup', children=[], ),
+                                                                html.Div(id='m1', n_clicks=0),  # merge용
+                                                                dbc.Modal(id='merge_popup', children=[], ),
+                                                                dbc.Modal(id='load_popup', children=[]),
+                                                                dbc.Modal(id='clone_popup', children=[]),
+                                                                ])
 
 
 @app.callback(
@@ -467,170 +410,371 @@ def get_parent_directory(stored_cwd, n_clicks, currentdir):
 
 
 # parent directory를 가져옴
+# 정렬된 listing에서 cursor(page 첫 파일 이름)부터 한 page만 row를 만듦
+# cwd가 바뀌면 첫 page, git 명령 후에는 같은 page를 다시 그림 (선택은 page를 넘겨도 유지)
+# row는 column별 list로 보내고 browser에서 보이는 row만 그림 (assets/listing_grid.js)
 @app.callback(
-    Output('cwd_files', 'children'),
+    Output('listing_info', 'children'),
+    Output('listing_data', 'data'),
+    Output('scan_poll', 'disabled'),
+    Output('page', 'data'),
+    Output('selected', 'data'),
+    Output('listing_version', 'data'),
     Input('cwd', 'children'),
-    Input('dummy2', "n_clicks"),
-    Input('dummy4', "n_clicks"),
-    Input('dummy5', "n_clicks"),
-    Input('dummy6', "n_clicks"),
-    Input('dummy7', "n_clicks"),
-    Input('dummy8', "n_clicks"),
-    Input('dummy9', "n_clicks"),
-    Input('dummy10', "n_clicks"),
-    Input('dummy11', 'n_clicks'),
-    Input('dummy12', 'n_clicks'),
-    Input('dummy13', "n_clicks")
+    Input('repo_version', 'data'),
+    Input('scan_poll', 'n_intervals'),
+    Input('page_prev', 'n_clicks'),
+    Input('page_next', 'n_clicks'),
+    Input({'type': 'page_letter', 'index': ALL}, 'n_clicks'),
+    Input('page_size', 'value'),
+    State('page', 'data'),
+    State('selected', 'data'),
+    State('listing_version', 'data'),
+    prevent_initial_call=True
 )
-def list_cwd_files(cwd, clk_d2, clk_d4, clk_d5, clk_d6, clk_d7, clk_d8, clk_d9, clk_d10, clk_d11, clk_d12, clk_d13):
+def list_cwd_files(cwd, repo_version, n_intervals, prev_clk, next_clk, letter_clk, page_size, page, selected,
+                   sent_version):
     path = Path(cwd)
-    all_file_details = []
-    if path.is_dir():
-        if not is_git_repo(path):
-            files = sorted(os.listdir(path), key=str.lower)
-            for i, file in enumerate(files):
-                filepath = Path(file)
-                full_path = os.path.join(cwd, filepath.as_posix())
-                is_dir = Path(full_path).is_dir()
-                link = html.A([
-                    html.Span(
-                        file, id={'type': 'listed_file', 'index': i},
-                        title=full_path,
-                        style={'fontWeight': 'bold', 'fontSize': 18} if is_dir else {}
-                    )], href='#')
-                details = file_info(Path(full_path))
-                details['chbox'] = dmc.Checkbox(id={'type': 'dynamic-checkbox', 'index': i}, checked=False)
-                details['filename'] = link
-                if is_dir:
-                    details['extension'] = html.Img(
-                        src=app.get_asset_url('icons/default_folder.svg'),
-                        width=25, height=25)
-                else:
-                    details['extension'] = icon_file(details['extension'][1:])
-                all_file_details.append(details)
-        # git repository인 경우
-        else:
-            files = sorted(os.listdir(path), key=str.lower)
-            for i, file in enumerate(files):
-                filepath = Path(file)
-                full_path = os.path.join(cwd, filepath.as_posix())
-                is_dir = Path(full_path).is_dir()
-                link = html.A([
-                    html.Span(
-                        file, id={'type': 'listed_file', 'index': i},
-                        title=full_path,
-                        style={'fontWeight': 'bold', 'fontSize': 18} if is_dir else {}
-                    )], href='#')
-                details = file_info(Path(full_path))
-                details['chbox'] = dmc.Checkbox(id={'type': 'dynamic-checkbox', 'index': i}, checked=False)
-                details['filename'] = link
-                status = get_git_file_status(file)
-
-                #
-                if file == '.git':
-                    details['extension'] = icon_file('.git')
-                elif is_dir:
-                    details['extension'] = html.Img(
-                        src=app.get_asset_url('icons/default_folder.svg'),
-                        width=25, height=25)
-                    result = directory_status(file)
-                    result = result[0]
-                    # app.logger.info(result)
-                    if result == '':
-                        details['status'] = 'committed'
-                    elif result == '??':
-                        details['status'] = 'untracked'
-                    elif result == '!!':
-                        details['status'] = 'ignored'
-                    elif result[0] in ['M', 'T', 'A', 'R', 'C']:
-                        details['extension'] = icon_file("staged")
-                        string = ''
-                        result1 = get_git_status_meaning(file)
-                        for j in range(len(result1)):
-                            string += result1[j]
-                            if j != len(result1) - 1:
-                                string += " && "
-                        details['status'] = string
-                    elif result[0] == ' ':  # to implement delete, rename, type change later
-                        if result[1] == 'M':
-                            details['extension'] = icon_file("modified")
-                    elif result in ['**', '*?', '*!']:
-                        details['extension'] = icon_file("question")
-                        string = ''
-                        result1 = get_git_status_meaning(file)
-                        for j in range(len(result1)):
-                            string += result1[j]
-                            if j != len(result1) - 1:
-                                string += " && "
-                        details['status'] = string
-                elif status == '':
-                    details['extension'] = icon_file("committed")
-                elif status == '??':
-                    details['extension'] = icon_file("untracked")
-                elif status == '!!':
-                    details['extension'] = icon_file("ignored")  # need ignored icons
-                elif status[0] in ['M', 'T', 'A', 'R', 'C']:
-                    details['extension'] = icon_file("staged")
-                    string = ''
-                    result = get_git_status_meaning(file)
-                    for j in range(len(result)):
-                        string += result[j]
-                        if j != len(result) - 1:
-                            string += " && "
-                    details['status'] = string
-                elif status[0] == ' ':  # to implement delete, rename, type change later
-                    if status[1] == 'M':
-                        details['extension'] = icon_file("modified")
-                elif status in ['**', '*?', '*!']:
-                    details['extension'] = icon_file("question")
-                    string = ''
-                    result = get_git_status_meaning(file)
-                    for j in range(len(result)):
-                        string += result[j]
-                        if j != len(result) - 1:
-                            string += " && "
-                    details['status'] = string
-                all_file_details.append(details)
-
-    df = pd.DataFrame(all_file_details)
-    df = df.rename(columns={"extension": ''})
-    table = dbc.Table.from_dataframe(df, striped=False, bordered=False,
-                                     hover=True, size='sm')
-    return html.Div(table)
-
-
-# 클릭한 파일의 이름을 반환
-@app.callback(
-    Output('stored_cwd', 'data'),
-    Input({'type': 'listed_file', 'index': ALL}, 'n_clicks'),
-    State({'type': 'listed_file', 'index': ALL}, 'title'))
-def store_clicked_file(n_clicks, title):
-    if not n_clicks or set(n_clicks) == {None}:
+    page = page or {}
+    selected = shown_selected = selected or []
+    if not path.is_dir():
+        return '', listing_payload(cwd, listing_page([]), None), True, {}, [], None
+    triggered_id = callback_context.triggered_id
+    shown = page.get('version') if page.get('path') == cwd else None
+    # version은 repo_version store 값도 봄 (git 명령을 다른 worker가 실행했을 수 있음)
+    if triggered_id == 'repo_version':
+        # 짧은 시간에 여러 번 바뀌면 마지막 version만 그림, 이미 그린 version이면 건너뜀
+        state = repo_state.settle(cwd, repo_version)
+        if shown is not None and state <= shown:
+            repo_state.skipped()
+            raise PreventUpdate
+        repo_state.rendered(cwd, shown, state)
+    state = repo_state.version(cwd, repo_version)
+    cursor = page.get('cursor') if page.get('path') == cwd else None
+    page_size = page_size or listing.PAGE_SIZE
+    records, scan, done = progressive_listing(cwd)
+    snapshot = cached_snapshot(cwd, records=complete_listing(records, scan, done)) if is_git_repo(path) else None
+    running = not done
+    if page.get('path') != cwd:
+        selected = []
+    elif triggered_id in ('page_prev', 'page_next'):
+        # 이전/다음 page는 지금의 listing에서 계산 (scan 중에 entry가 늘어날 수 있음)
+        current = listing_page(records, cursor, page_size, is_sorted=not running)
+        cursor = (current.prev_cursor if triggered_id == 'page_prev' else current.next_cursor) or cursor
+    elif isinstance(triggered_id, dict) and triggered_id.get('type') == 'page_letter':
+        cursor = None if triggered_id['index'] == '#' else triggered_id['index']
+    elif triggered_id not in ('scan_poll', 'page_size'):
+        # git 명령 후에는 선택을 지움
+        selected = []
+    view = listing_view(cwd, records, scan, done, cursor, page_size, snapshot, state, sent_version)
+    # browser가 이미 가진 것과 같은 listing이면 보내지 않음 (204)
+    # page store에 done과 entry 수가 있으므로 scan이 끝난 응답(scan_poll 멈춤, partial 표시)은 보냄
+    if view['version'] == sent_version and view['page'] == page and selected == shown_selected:
         raise PreventUpdate
-    ctx = callback_context
-    index = ctx.triggered_id['index']
-    return title[index]
+    return view['info'], view['data'], view['done'], view['page'], selected, view['version']
+
+
+# 끝까지 읽은 listing이면 return (git status overlay가 파일을 다시 stat하지 않고 씀)
+def complete_listing(records, scan, done):
+    if done and (scan is None or (not scan.partial and scan.error is None)):
+        return records
+    return None
+
+
+# 한 page의 listing_info, listing_data, page store
+# done: records가 끝난 scan의 정렬된 listing인지 (progressive_listing이 records와 함께 돌려준 값)
+# sent_version: browser가 가진 payload (같은 파일들이면 바뀐 row만 Patch로 보냄)
+def listing_view(cwd, records, scan, done, cursor, page_size, snapshot, state, sent_version=None):
+    running = not done
+    current = listing_page(records, cursor, page_size, is_sorted=not running)
+    info = [html.Span(page_range(current), style={'margin-right': '15px'}),
+            html.Span(scan_progress(scan, len(records), not running))]
+    if repo_state.saved:
+        info.append(html.Span(f'{repo_state.saved:,} renders saved', className='text-muted',
+                              style={'margin-left': '15px'}))
+    # done, entries: scan이 끝났는지와 읽은 entry 수 (listing_info와 scan_poll이 바뀌었는지 비교하는 데 씀)
+    page = {'path': cwd, 'cursor': cursor, 'version': state, 'done': not running, 'entries': len(records)}
+    # browser가 가진 page와 같은 파일들이면 바뀐 row만 Patch로 보냄 (git 명령 후)
+    previous = sent_payloads.get(sent_version)
+    if previous is not None and previous['path'] == cwd and previous['names'] == [r.name for r in current.records]:
+        payload = listing_payload(cwd, current, snapshot, previous, state)
+        data, changed = payload_patch(previous, payload)
+        info.append(html.Span(f'updated {changed:,} of {len(payload["names"]):,} rows', style={'margin-left': '15px'}))
+    else:
+        data = payload = listing_payload(cwd, current, snapshot, state=state)
+    return {'info': info, 'data': data, 'done': not running, 'page': page, 'version': sent_payloads.add(payload)}
+
+
+# layout에 넣을 첫 화면 (첫 page의 listing과 repo_info)
+# 새로고침이 몰려도 같은 directory, 같은 version이면 INITIAL_VIEW_TTL초 동안 다시 만들지 않음
+INITIAL_VIEW_TTL = 2.0
+_initial_view = None  # (cwd, 만든 시각, repo_state version, view)
+
+
+def initial_view(cwd):
+    global _initial_view
+    state = repo_state.version(cwd)
+    now = time.monotonic()
+    cached = _initial_view
+    if cached is not None and cached[0] == cwd and now - cached[1] < INITIAL_VIEW_TTL and cached[2] == state:
+        return cached[3]
+    info = repo_info(cwd, None)
+    if not info['is_dir']:
+        view = {'info': '', 'data': listing_payload(cwd, listing_page([]), None), 'done': True, 'page': {},
+                'version': None}
+    else:
+        records, scan, done = progressive_listing(cwd)
+        snapshot = cached_snapshot(cwd, records=complete_listing(records, scan, done)) if info['is_git'] else None
+        view = listing_view(cwd, records, scan, done, None, listing.PAGE_SIZE, snapshot, state)
+    view['repo_info'] = info
+    # scan 중인 listing은 scan_poll이 이어서 그리므로 저장하지 않음
+    if view['done']:
+        _initial_view = (cwd, now, state, view)
+    return view
+
+
+def branch_label(info):
+    if not info['is_dir']:
+        return 'file'
+    return 'current branch: ' + (info['branch'] or '') if info['is_git'] else 'not git repo'
+
+
+# 현재 page가 listing의 몇 번째 row들인지
+def page_range(page):
+    if not page.records:
+        return ''
+    return f'rows {page.start + 1:,}-{page.start + len(page.records):,} of {page.total:,}'
+
+
+# 같은 값은 한 번만 보내고 row에는 번호만 넣음 (icon, status, badge)
+def _interned(table, value):
+    return table.setdefault(value, len(table))
+
+
+def listing_payload(cwd, page, snapshot, previous=None, state=0):
+    """Column-oriented data of one listing page, drawn by assets/listing_grid.js.
+
+    Times are minutes since `time_base` (ctimes relative to the mtime of the
+    same row); icon, status, git status code and badge columns index the
+    `*_table` lists (icons are symbol ids in the `sprite` file). `state` is
+    the repo_state version the page shows. With a `previous` payload, its
+    time base and tables are reused (new values are appended), so the two
+    can be compared column by column.
+    """
+    if previous is not None:
+        icon_table = {f'{icon}.svg': i for i, icon in enumerate(previous['icon_table'])}
+        status_table = {status: i for i, status in enumerate(previous['status_table'])}
+        code_table = {code: i for i, code in enumerate(previous['code_table'])}
+        badge_table = {badge: i for i, badge in enumerate(previous['badge_table'])}
+        base = previous['time_base']
+    else:
+        icon_table, status_table, code_table, badge_table = {}, {'': 0}, {'': 0}, {'': 0}
+        base = min((record.mtime_ns for record in page.records), default=0) // 60000000000
+    # column 단위로 한 번에 만듦 (git status도 page 전체를 한 번에 조회)
+    records = page.records
+    names = [record.name for record in records]
+    is_dirs = [record.is_dir for record in records]
+    types = ['d' if record.is_dir else 'l' if record.symlink_target is not None else 'f' for record in records]
+    sizes = [record.size for record in records]
+    minutes = [record.mtime_ns // 60000000000 for record in records]
+    mtimes = [mtime - base for mtime in minutes]
+    ctimes = [record.ctime_ns // 60000000000 - mtime for record, mtime in zip(records, minutes)]
+    if snapshot is not None:
+        git_codes, dir_codes = snapshot.children_status(cwd, names, is_dirs)
+    else:
+        git_codes = dir_codes = [''] * len(records)
+    icons_, statuses, codes, badges = [], [], [], {}
+    for i, record in enumerate(records):
+        icon, status, code = file_details(cwd, record, snapshot, git_codes[i], dir_codes[i])
+        icons_.append(_interned(icon_table, icon))
+        statuses.append(_interned(status_table, status))
+        codes.append(_interned(code_table, code))
+        if record.is_dir:
+            info = repo_index.marker(os.path.join(cwd, record.name))
+            if info is not None:
+                badges[i] = _interned(badge_table, info.kind)
+    return {
+        'path': cwd, 'sep': os.sep, 'start': page.start, 'total': page.total, 'git': snapshot is not None,
+        'names': names, 'types': ''.join(types), 'sizes': sizes, 'time_base': base, 'mtimes': mtimes,
+        'ctimes': ctimes, 'icons': icons_, 'icon_table': [symbol_id(icon) for icon in icon_table],
+        'status': statuses, 'status_table': list(status_table), 'codes': codes, 'code_table': list(code_table),
+        'badges': badges, 'badge_table': list(badge_table), 'state': state, 'sprite': SPRITE_URL,
+    }
+
+
+def payload_patch(old, new):
+    """Patch that turns payload `old` into `new` (the same names, `new`
+    built with listing_payload(..., previous=old)), and the number of rows
+    it changes."""
+    patch = Patch()
+    changed = set()
+    for column in ('sizes', 'mtimes', 'ctimes', 'icons', 'status', 'codes'):
+        for i, (a, b) in enumerate(zip(old[column], new[column])):
+            if a != b:
+                patch[column][i] = b
+                changed.add(i)
+    if old['types'] != new['types']:
+        patch['types'] = new['types']
+        changed.update(i for i, (a, b) in enumerate(zip(old['types'], new['types'])) if a != b)
+    # badges는 dict (JSON에서 key가 문자열)
+    old_badges = {int(i): badge for i, badge in old['badges'].items()}
+    if old_badges != new['badges']:
+        patch['badges'] = new['badges']
+        changed.update(i for i in set(old_badges) ^ set(new['badges']))
+        changed.update(i for i in set(old_badges) & set(new['badges']) if old_badges[i] != new['badges'][i])
+    for table in ('icon_table', 'status_table', 'code_table', 'badge_table'):
+        added = new[table][len(old[table]):]
+        if added:
+            patch[table].extend(added)
+    for key in ('start', 'total', 'git', 'state'):
+        if old[key] != new[key]:
+            patch[key] = new[key]
+    return patch, len(changed)
+
+
+def payload_version(payload):
+    """Content hash of a payload: every worker gives the same listing the
+    same version, and a version names exactly one payload."""
+    data = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(data.encode()).hexdigest()[:20]
+
+
+class SentPayloads:
+    """The last listing payloads sent to browsers, by content hash, so that
+    the next render of the same page can be sent as a Patch. A browser's
+    version is only found on a worker that built the same payload; other
+    workers send the whole payload."""
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, payload):
+        """Remember `payload`; returns its version (payload_version)."""
+        version = payload_version(payload)
+        with self._lock:
+            self._items[version] = payload
+            self._items.move_to_end(version)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return version
+
+    def get(self, version):
+        with self._lock:
+            return self._items.get(version)
+
+
+sent_payloads = SentPayloads()
+
+
+# listing의 row 하나의 icon 파일 이름, git status 설명, git status code (button 상태 계산용)
+# status, result: snapshot.children_status로 page 전체를 한 번에 구한 file / directory status
+def file_details(cwd, record, snapshot, status, result):
+    file = record.name
+    full_path = os.path.join(cwd, file)
+    is_dir = record.is_dir
+    if snapshot is None:
+        if is_dir:
+            return 'default_folder.svg', '', ''
+        return icon_resolver.icon(file), '', ''
+    # git repository인 경우
+    icon, meaning = icon_resolver.icon(file), ''
+    if file == '.git':
+        icon = icon_name('.git')
+    elif is_dir:
+        icon = 'default_folder.svg'
+        # app.logger.info(result)
+        if result == '':
+            meaning = 'committed'
+        elif result == '??':
+            meaning = 'untracked'
+        elif result == '!!':
+            meaning = 'ignored'
+        elif result[0] in ['M', 'T', 'A', 'R', 'C']:
+            icon = icon_name("staged")
+            meaning = " && ".join(get_git_status_meaning(full_path, snapshot))
+        elif result[0] == ' ':  # to implement delete, rename, type change later
+            if result[1] == 'M':
+                icon = icon_name("modified")
+        elif result in ['**', '*?', '*!']:
+            icon = icon_name("question")
+            meaning = " && ".join(get_git_status_meaning(full_path, snapshot))
+    elif status == '':
+        icon = icon_name("committed")
+    elif status == '??':
+        icon = icon_name("untracked")
+    elif status == '!!':
+        icon = icon_name("ignored")  # need ignored icons
+    elif status[0] in ['M', 'T', 'A', 'R', 'C']:
+        icon = icon_name("staged")
+        meaning = " && ".join(get_git_status_meaning(full_path, snapshot))
+    elif status[0] == ' ':  # to implement delete, rename, type change later
+        if status[1] == 'M':
+            icon = icon_name("modified")
+    elif status in ['**', '*?', '*!']:
+        icon = icon_name("question")
+        meaning = " && ".join(get_git_status_meaning(full_path, snapshot))
+    return icon, meaning, status
+
+
+# 읽은 entry 개수, scan 중이거나 budget을 넘어 일부만 읽은 경우 표시
+def scan_progress(scan, count, done=True):
+    if scan is None or (done and not scan.partial):
+        return f'{count:,} entries'
+    if not done:
+        return f'scanning... {count:,} entries so far'
+    return [dbc.Badge('partial listing', color='warning', className='me-2'),
+            f'stopped after {count:,} entries in {scan.elapsed:.1f}s (scan budget: '
+            f'{scan.max_entries:,} entries, {scan.max_seconds:g}s)']
+
+
+# listing_data가 바뀌거나 선택이 바뀌면 browser에서 table을 다시 그림
+# (파일 이름 클릭 -> stored_cwd, checkbox -> selected 는 listing_grid.js가 set_props로 바꿈)
+app.clientside_callback(
+    ClientsideFunction(namespace='listing', function_name='render'),
+    Output('listing_rendered', 'data'),
+    Input('listing_data', 'data'),
+    Input('selected', 'data')
+)
 
 
 # git init
 @app.callback(
-    Output('dummy2', "n_clicks"),
+    Output('repo_version', 'data', allow_duplicate=True),
     Input({'type': 'git_button', 'index': 1}, 'n_clicks'),
     State('cwd', 'children'),
-    State('dummy2', "n_clicks")
+    prevent_initial_call=True
 )
-def git_init(n_clicks, cwd, d_clk):
+def git_init(n_clicks, cwd):
     if n_clicks == 0:
         raise PreventUpdate
     path = Path(cwd)
-    d_clk = d_clk + 1
     if not is_git_repo(path):
-        os.system("cd " + str(path) + " && git init")
-    return d_clk
+        run_git(['init'], cwd)
+        repo_index.invalidate(cwd)
+        invalidate_snapshot(cwd)
+    return repo_state.bump(cwd)
 
 
-# checkbox를 활용해 command할 파일 선택
+# 현재 directory가 git repository인지, 현재 branch (directory나 repository가 바뀔 때만 계산)
 @app.callback(
+    Output('repo_info', 'data'),
+    Input('cwd', 'children'),
+    Input('repo_version', 'data'),
+    prevent_initial_call=True
+)
+def repo_info(cwd, repo_version):
+    if not os.path.isdir(cwd):
+        return {'is_dir': False}
+    is_git = is_git_repo(cwd)
+    return {'is_dir': True, 'is_git': is_git, 'branch': get_current_branch(cwd) if is_git else None}
+
+
+# checkbox를 활용해 command할 파일 선택
+# listing과 함께 보낸 status code로 browser에서 button 상태를 계산 (assets/listing_grid.js)
+app.clientside_callback(
+    ClientsideFunction(namespace='listing', function_name='buttons'),
     Output({'type': 'git_button', 'index': 1}, 'disabled'),  # git_init
     Output('currentBranch', 'children'),  # is_git_repo
     Output({'type': 'git_button', 'index': 4}, 'disabled'),  # git_add
@@ -646,247 +790,163 @@ def git_init(n_clicks, cwd, d_clk):
     Output('open-popup-button-2', 'disabled'),
     Output('git_clone', 'disabled'),
     Input({'type': 'git_button', 'index': 3}, 'n_clicks'),
-    State({'type': 'dynamic-checkbox', 'index': ALL}, 'checked'),
-    Input('cwd', 'children'),
-    Input('c1', 'n_clicks')
+    Input('repo_info', 'data'),
+    State('selected', 'data'),
+    State('listing_data', 'data')
 )
-def check(n_clicks, checked, cwd, c1):
-    btn_able = []
-    if not os.path.isdir(cwd):
-        return True, 'file', True, True, True, True, True, True, True, 0, True, True, True, True
-    files = sorted(os.listdir(cwd), key=str.lower)
-    # if n_clicks is None:
-    # raise PreventUpdate
-    update_files = []
-    branch_flag = True
-    is_git = is_git_repo(cwd)
-    if is_git == True:
-        command = get_current_branch()
-        msg = "current branch: " + command
-        branch_flag = False
-    else:
-        msg = 'not git repo'
-        branch_flag = True
-    if n_clicks == 1:
-        for i in range(len(checked)):
-            if checked[i]:
-                if os.path.isdir(cwd + '/' + files[i]):
-                    return is_git, msg, True, True, True, True, True, True, True, 0, branch_flag, branch_flag, branch_flag, not branch_flag
-                update_files.append(files[i])
-
-        if len(update_files) == 0:
-            return is_git, msg, True, True, True, True, True, True, True, 0, branch_flag, branch_flag, branch_flag, not branch_flag
-
-        states = [get_git_file_status(i) for i in update_files]
-
-        # committed
-        if set(states) and set(states).issubset(set([''])):
-            if len(states) == 1:  # check 1 -> rename able
-                return is_git, msg, True, True, True, False, False, False, False, 0, branch_flag, branch_flag, branch_flag, not branch_flag
-            else:  # multiple check --> rename unable
-                return is_git, msg, True, True, True, False, False, True, True, 0, branch_flag, branch_flag, branch_flag, not branch_flag
-
-        btn_able = [is_git, msg, True, True, True, True, True, True, True, 0, branch_flag, branch_flag, branch_flag,
-                    not branch_flag]
-        flag = 1
-        for s in states:
-            if len(s) == 0:
-                break
-            if s[0] in [' ', '?', '!']:
-                flag = 0
-                break
-        if flag == 1:  # if all checked files are staged
-            btn_able[4] = False
-
-        # modified --> git add + git restore
-        if set(states) and set(states).issubset(set([' M', 'MM', 'TM', 'AM', 'RM', 'CM'])):
-            btn_able[2] = False
-            btn_able[3] = False
-            # return is_git, msg, False, False, True, True, True, True, True, 0
-        # update할 파일이 untracked인 경우 or modified인경우 --> git add 가능
-        elif set(states) and set(states).issubset(set([' M', 'MM', 'TM', 'AM', 'RM', 'CM', '??', '*?'])):
-            btn_able[2] = False
-            # return is_git, msg, False, True, True, True, True, True, True, 0
-        return btn_able
-    return is_git, msg, True, True, True, True, True, True, True, 0, branch_flag, branch_flag, branch_flag, not branch_flag
 
 
 # Add (git add) [ untracked -> staged / modified -> staged ]
 @app.callback(
     Output({'type': 'git_button', 'index': 4}, 'n_clicks'),
-    Output('dummy4', 'n_clicks'),
+    Output('repo_version', 'data', allow_duplicate=True),
+    Output('action_result', 'children', allow_duplicate=True),
     State({'type': 'git_button', 'index': 3}, 'value'),
-    State({'type': 'dynamic-checkbox', 'index': ALL}, 'checked'),
+    State('selected', 'data'),
     State('cwd', 'children'),
-    State('dummy4', 'n_clicks'),
-    Input({'type': 'git_button', 'index': 4}, 'n_clicks')
+    Input({'type': 'git_button', 'index': 4}, 'n_clicks'),
+    prevent_initial_call=True
 )
-def git_add(value, checked, cwd, d_clk, n_clicks):
+def git_add(value, selected, cwd, n_clicks):
     if n_clicks == 1:
-        files = sorted(os.listdir(cwd), key=str.lower)
-        staged = []
-        for i in range(len(checked)):
-            if checked[i] == True:
-                staged.append(files[i])
-        for file in staged:
-            os.system("cd " + str(Path(cwd)) + " && git add " + '"' + file + '"')
-        return 0, d_clk + 1
-    return 0, d_clk
+        staged = list(selected)
+        report = git_batch(['add'], staged, cwd)
+        return 0, repo_state.bump(cwd), report
+    return 0, no_update, None
 
 
 # Restore (git restore) [ modified -> unmodified ]
 @app.callback(
     Output({'type': 'git_button', 'index': 5}, 'n_clicks'),
-    Output('dummy5', 'n_clicks'),
+    Output('repo_version', 'data', allow_duplicate=True),
+    Output('action_result', 'children', allow_duplicate=True),
     State({'type': 'git_button', 'index': 3}, 'value'),
-    State({'type': 'dynamic-checkbox', 'index': ALL}, 'checked'),
+    State('selected', 'data'),
     State('cwd', 'children'),
-    State('dummy5', 'n_clicks'),
-    Input({'type': 'git_button', 'index': 5}, 'n_clicks')
+    Input({'type': 'git_button', 'index': 5}, 'n_clicks'),
+    prevent_initial_call=True
 )
-def git_restore(value, checked, cwd, d_clk, n_clicks):
+def git_restore(value, selected, cwd, n_clicks):
     if n_clicks == 1:
-        files = sorted(os.listdir(cwd), key=str.lower)
-        staged = []
-        for i in range(len(checked)):
-            if checked[i] == True:
-                staged.append(files[i])
-        for file in staged:
-            os.system("cd " + str(Path(cwd)) + " && git restore " + '"' + file + '"')
-        return 0, d_clk + 1
-    return 0, d_clk
+        staged = list(selected)
+        report = git_batch(['restore'], staged, cwd)
+        return 0, repo_state.bump(cwd), report
+    return 0, no_update, None
 
 
 # Unstaged  (git rm --cached) (git restore --staged) [ staged -> modified or untracked ]
 @app.callback(
     Output({'type': 'git_button', 'index': 6}, 'n_clicks'),
-    Output('dummy6', 'n_clicks'),
+    Output('repo_version', 'data', allow_duplicate=True),
+    Output('action_result', 'children', allow_duplicate=True),
     State({'type': 'git_button', 'index': 3}, 'value'),
-    State({'type': 'dynamic-checkbox', 'index': ALL}, 'checked'),
+    State('selected', 'data'),
     State('cwd', 'children'),
-    State('dummy6', 'n_clicks'),
-    Input({'type': 'git_button', 'index': 6}, 'n_clicks')
+    Input({'type': 'git_button', 'index': 6}, 'n_clicks'),
+    prevent_initial_call=True
 )
-def git_unstaged(value, checked, cwd, d_clk, n_clicks):
+def git_unstaged(value, selected, cwd, n_clicks):
     if n_clicks == 1:
-        files = sorted(os.listdir(cwd), key=str.lower)
-        staged = []
-        d_clk = d_clk + 1
-        for i in range(len(checked)):
-            if checked[i] == True:
-                staged.append(files[i])
+        staged = list(selected)
         try:
-            os.system("cd " + str(Path(cwd)))
-            # d = os.getcwd()
-            # os.system("git log --pretty=oneline")
-            result = subprocess.run(['git', 'log', '--pretty=oneline'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            result = run_git(['log', '--pretty=oneline'], cwd)
             output = result.stderr.decode('utf-8')
             # git_log = os.popen("git log --pretty=oneline").read()
             if "fatal" in output.lower():
-                for file in staged:
-                    os.system("cd " + str(Path(cwd)) + " && git rm --cached " + '"' + file + '"')
+                report = git_batch(['rm', '--cached'], staged, cwd)
             else:
-                for file in staged:
-                    os.system("cd " + str(Path(cwd)) + " && git restore --staged " + '"' + file + '"')
+                report = git_batch(['restore', '--staged'], staged, cwd)
+            return 0, repo_state.bump(cwd), report
         except:
-            return 0, d_clk
-    return 0, d_clk
+            return 0, no_update, None
+    return 0, no_update, None
 
 
 # Untracked (git rm --cached) [ unmodified -> untracked ]
 @app.callback(
     Output({'type': 'git_button', 'index': 7}, 'n_clicks'),
-    Output('dummy7', 'n_clicks'),
+    Output('repo_version', 'data', allow_duplicate=True),
+    Output('action_result', 'children', allow_duplicate=True),
     State({'type': 'git_button', 'index': 3}, 'value'),
-    State({'type': 'dynamic-checkbox', 'index': ALL}, 'checked'),
+    State('selected', 'data'),
     State('cwd', 'children'),
-    State('dummy7', 'n_clicks'),
-    Input({'type': 'git_button', 'index': 7}, 'n_clicks')
+    Input({'type': 'git_button', 'index': 7}, 'n_clicks'),
+    prevent_initial_call=True
 )
-def git_untracked(value, checked, cwd, d_clk, n_clicks):
+def git_untracked(value, selected, cwd, n_clicks):
     if n_clicks == 1:
-        files = sorted(os.listdir(cwd), key=str.lower)
-        staged = []
-        for i in range(len(checked)):
-            if checked[i] == True:
-                staged.append(files[i])
-        for file in staged:
-            os.system("cd " + str(Path(cwd)) + " && git rm --cached " + '"' + file + '"')
-        return 0, d_clk + 1
-    return 0, d_clk
+        staged = list(selected)
+        report = git_batch(['rm', '--cached'], staged, cwd)
+        return 0, repo_state.bump(cwd), report
+    return 0, no_update, None
 
 
 # delete (git rm) [ unmodified -> staged ]
 @app.callback(
     Output({'type': 'git_button', 'index': 8}, 'n_clicks'),
-    Output('dummy8', 'n_clicks'),
+    Output('repo_version', 'data', allow_duplicate=True),
+    Output('action_result', 'children', allow_duplicate=True),
     State({'type': 'git_button', 'index': 3}, 'value'),
-    State({'type': 'dynamic-checkbox', 'index': ALL}, 'checked'),
+    State('selected', 'data'),
     State('cwd', 'children'),
-    State('dummy8', 'n_clicks'),
-    Input({'type': 'git_button', 'index': 8}, 'n_clicks')
+    Input({'type': 'git_button', 'index': 8}, 'n_clicks'),
+    prevent_initial_call=True
 )
-def git_delete(value, checked, cwd, d_clk, n_clicks):
+def git_delete(value, selected, cwd, n_clicks):
     if n_clicks == 1:
-        files = sorted(os.listdir(cwd), key=str.lower)
-        staged = []
-        for i in range(len(checked)):
-            if checked[i] == True:
-                staged.append(files[i])
-        for file in staged:
-            os.system("cd " + str(Path(cwd)) + " && git rm " + '"' + file + '"')
-        return 0, d_clk + 1
-    return 0, d_clk
+        staged = list(selected)
+        report = git_batch(['rm'], staged, cwd)
+        return 0, repo_state.bump(cwd), report
+    return 0, no_update, None
 
 
 # rename
 @app.callback(
     Output({'type': 'git_button', 'index': 9}, 'n_clicks'),
-    Output('dummy9', 'n_clicks'),
-    State({'type': 'dynamic-checkbox', 'index': ALL}, 'checked'),
+    Output('repo_version', 'data', allow_duplicate=True),
+    State('selected', 'data'),
     State('cwd', 'children'),
-    State('dummy9', 'n_clicks'),
     Input({'type': 'git_button', 'index': 9}, 'n_clicks'),
-    State('rename', 'value')
+    State('rename', 'value'),
+    prevent_initial_call=True
 )
-def git_rename(checked, cwd, n_clicks, d_clk, value):
-    if n_clicks:
-        index = 0
-        for i in range(len(checked)):
-            if checked[i]:
-                index = i
-                break
-        files = sorted(os.listdir(cwd), key=str.lower)
-        os.system("cd " + str(Path(cwd)) + " && git mv " + '"' + files[index] + '"' + " " + '"' + value + '"')
-        return 0, d_clk + 1
-    return 0, d_clk
+def git_rename(selected, cwd, n_clicks, value):
+    if n_clicks and selected:
+        run_git(['mv', selected[0], value], cwd)
+        invalidate_snapshot(cwd)
+        return 0, repo_state.bump(cwd)
+    return 0, no_update
 
 
 # commit 버튼 누를 경우 팝업
 @app.callback(Output('confirm', 'displayed'),
               Output('confirm', 'message'),
-              Input({'type': 'git_button', 'index': 10}, 'n_clicks'))
-def update_output(n_clicks):
+              Input({'type': 'git_button', 'index': 10}, 'n_clicks'),
+              State('cwd', 'children'))
+def update_output(n_clicks, cwd):
     if n_clicks:
-        return True, os.popen("git status").read()
+        snapshot = cached_snapshot(cwd, scope=find_repo_root(cwd))
+        if snapshot is None:
+            return True, run_git(['status'], cwd, encoding='utf-8').stdout
+        return True, snapshot.format_status()
     return False, ''
 
 
 # Commit (git commit -m "") [Staged -> Committed]
 @app.callback(
     Output({'type': 'git_button', 'index': 10}, 'n_clicks'),
-    Output('dummy10', 'n_clicks'),
+    Output('repo_version', 'data', allow_duplicate=True),
     State('cwd', 'children'),
     State('commit', 'value'),
-    State('dummy10', 'n_clicks'),
-    Input('confirm', 'submit_n_clicks')
+    Input('confirm', 'submit_n_clicks'),
+    prevent_initial_call=True
 )
-def git_commit(cwd, value, d_clk, submit_n_clicks):
+def git_commit(cwd, value, submit_n_clicks):
     if submit_n_clicks:
-        files = sorted(os.listdir(cwd), key=str.lower)
-        os.system("cd " + str(Path(cwd)) + " && git commit -m \"" + value + "\"")
-        return 0, d_clk + 1
-    return 0, d_clk
+        run_git(['commit', '-m', value], cwd)
+        invalidate_snapshot(cwd)
+        return 0, repo_state.bump(cwd)
+    return 0, no_update
 
 
 def get_mem_user(project_dir):
@@ -982,6 +1042,7 @@ def visibility_control(visibility):
     Output('clone_popup', 'is_open'),
     Output('clone_popup', 'children'),
     Output('do_clone', 'n_clicks'),
+    Output('repo_version', 'data', allow_duplicate=True),
     Input('do_clone', 'n_clicks'),
     Input('close_clone', 'n_clicks'),
     Input('load_clone', 'n_clicks'),
@@ -994,7 +1055,8 @@ def visibility_control(visibility):
     State('dummy14', 'n_clicks'),
     State('project_dir', 'data'),
     State('load_popup', 'is_open'),
-    State('clone_popup', 'is_open')
+    State('clone_popup', 'is_open'),
+    prevent_initial_call=True
 )
 def git_clone(do_clk, close_clk, load_clk, visibility, url, id, token, cwd, clk_d13, clk_d14, project_dir, load_open, clone_open):
     triggered_id = callback_context.triggered_id
@@ -1010,7 +1072,7 @@ def git_clone(do_clk, close_clk, load_clk, visibility, url, id, token, cwd, clk_
             data = 'save file not found.'
         else:
             data = 'error.'
-        return 0, clk_d14, url, id_val, token_val, True, data, False, '', 0
+        return 0, clk_d14, url, id_val, token_val, True, data, False, '', 0, no_update
     if not do_clk == 0:
         data = ''
         if visibility == 'public':
@@ -1019,8 +1081,7 @@ def git_clone(do_clk, close_clk, load_clk, visibility, url, id, token, cwd, clk_
                 url = url[len("https://"):]
                 url = 'https://' + ':' + '@' + url
                 command = ['git', 'clone', url]
-                os.system('cd ' + str(Path(cwd)))
-                result = subprocess.run(command, check=True, capture_output=True, text=True)
+                result = subprocess.run(command, cwd=cwd, check=True, capture_output=True, text=True)
                 data = 'Clone successful'
                 clk_d13 = 1
             except subprocess.CalledProcessError as e:
@@ -1036,8 +1097,7 @@ def git_clone(do_clk, close_clk, load_clk, visibility, url, id, token, cwd, clk_
                 url = url[len("https://"):]
                 url = 'https://' + id + ':' + token + '@' + url
                 command = ['git', 'clone', url]
-                os.system('cd ' + str(Path(cwd)))
-                result = subprocess.run(command, check=True, capture_output=True, text=True)
+                result = subprocess.run(command, cwd=cwd, check=True, capture_output=True, text=True)
                 data = 'Clone successful'
                 write_mem_user(project_dir, id, token)
                 clk_d13 = 1
@@ -1047,8 +1107,8 @@ def git_clone(do_clk, close_clk, load_clk, visibility, url, id, token, cwd, clk_
                 else:
                     data = "An error occurred while cloning the repository:" + str(e)
                 clk_d13 = 0
-        return clk_d13, 0, '', '', '', False, '', True, data, 0
-    return clk_d13, 0, '', '', '', load_open, '', clone_open, '', 0
+        return clk_d13, 0, '', '', '', False, '', True, data, 0, repo_state.bump(cwd) if clk_d13 else no_update
+    return clk_d13, 0, '', '', '', load_open, '', clone_open, '', 0, no_update
 
 
 @app.callback(
@@ -1064,11 +1124,12 @@ def git_clone(do_clk, close_clk, load_clk, visibility, url, id, token, cwd, clk_
     Input('b2', 'n_clicks'),
     Input('b3', 'n_clicks'),
     Input('b4', 'n_clicks'),
-    State('popup', 'is_open')
+    State('popup', 'is_open'),
+    State('cwd', 'children')
 )  # 오픈용..
-def toggle_popup(open_clicks, close_clicks, is_open, b1, b2, b3, b4):
+def toggle_popup(open_clicks, close_clicks, is_open, b1, b2, b3, b4, cwd):
     if open_clicks:
-        branch = find_branch()
+        branch = find_branch(cwd)
         return True, branch, 0, 0, '', ''
     return False, [], 0, 0, '', ''
 
@@ -1086,9 +1147,8 @@ def delete_branch(click, value, cwd, b1):
     if value:
         if value[0] == "*":
             value = value[1:].strip()
-        os.system('cd ' + str(Path(cwd)))
         command = ["git", "branch", "-d", value]
-        data = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, encoding='utf-8')
+        data = subprocess.run(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, encoding='utf-8')
         if not str(data.stderr):
             data = data.stdout
         else:
@@ -1099,49 +1159,48 @@ def delete_branch(click, value, cwd, b1):
     return b1, False, ''
 
 
-def find_branch():
-    result = os.popen("git branch").read()
-    result1 = os.popen("git branch -r").read()
+def find_branch(cwd):
+    result = run_git(['branch'], cwd, encoding='utf-8').stdout
+    result1 = run_git(['branch', '-r'], cwd, encoding='utf-8').stdout
     local, remote = [], []
     local = [i.strip() for i in result.split('\n') if "(HEAD detached at" not in i and i]
     if result1:
         remote = [i.strip() for i in result1.split('\n') if "->" not in i and i]
     result = local + remote
+    current_branch = get_current_branch(cwd)
     for i in range(len(result)):
-        if i == get_current_branch():
+        if i == current_branch:
             result[i] = "*" + result[i]
     return result
 
 
 @app.callback(
-    Output('dummy11', 'n_clicks'),
+    Output('repo_version', 'data', allow_duplicate=True),
     Output('b2', 'n_clicks'),
     Output('checkout_popup', 'is_open'),
     Output('checkout_popup', 'children'),
-    Output('c1', 'n_clicks'),
     Input('checkout_branch', 'n_clicks'),
     State('branch_dropdown', 'value'),
     State('cwd', 'children'),
-    State('dummy11', 'n_clicks'),
     State('b2', 'n_clicks'),
-    State('c1', 'n_clicks'),
+    prevent_initial_call=True
 )
-def checkout_branch(click, value, cwd, d_clk, b2, c1):
+def checkout_branch(click, value, cwd, b2):
     if value:
         if value[0] == "*":
             value = value[1:].strip()
         # app.logger.info(value)
-        os.system('cd ' + str(Path(cwd)))
         command = ["git", "checkout", value]
-        data = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, encoding='utf-8')
+        data = subprocess.run(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, encoding='utf-8')
+        invalidate_snapshot(cwd)
         if not str(data.stderr):
             data = data.stdout
         else:
             data = data.stderr
         if not data:
             data = 'checkout branch to ' + value
-        return d_clk + 1, b2 + 1, True, str(data), c1 + 1
-    return d_clk, b2, False, [], c1
+        return repo_state.bump(cwd), b2 + 1, True, str(data)
+    return no_update, b2, False, []
 
 
 @app.callback(
@@ -1155,10 +1214,9 @@ def checkout_branch(click, value, cwd, d_clk, b2, c1):
 )
 def create_branch(click, value, cwd, b3):
     if value:
-        os.system('cd ' + str(Path(cwd)))
         command = ["git", "branch", value]
 
-        data = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, encoding='utf-8')
+        data = subprocess.run(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, encoding='utf-8')
         # app.logger.info(data)
         if not str(data.stderr):
             data = data.stdout
@@ -1182,9 +1240,8 @@ def create_branch(click, value, cwd, b3):
 )
 def rename_branch(click, old, new, cwd, b4):
     if new:
-        os.system('cd ' + str(Path(cwd)))
         command = ["git", "branch", "-m", old, new]
-        data = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, encoding='utf-8')
+        data = subprocess.run(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, encoding='utf-8')
 
         if not str(data.stderr):
             data = data.stdout
@@ -1196,10 +1253,10 @@ def rename_branch(click, old, new, cwd, b4):
     return b4, False, ''
 
 
-def find_branch_merge():
-    result = os.popen("git branch --no-merged").read()
-    result1 = os.popen("git branch -r --no-merged").read()
-    current_branch = os.popen("git branch --show-current").read().strip()
+def find_branch_merge(cwd):
+    result = run_git(['branch', '--no-merged'], cwd, encoding='utf-8').stdout
+    result1 = run_git(['branch', '-r', '--no-merged'], cwd, encoding='utf-8').stdout
+    current_branch = run_git(['branch', '--show-current'], cwd, encoding='utf-8').stdout.strip()
 
     local = [i.strip() for i in result.split('\n') if
              "(HEAD detached at" not in i and i.strip() != current_branch and not i.startswith("*") and i.strip()]
@@ -1209,11 +1266,11 @@ def find_branch_merge():
     return local + remote
 
 
-def get_current_branch():
+def get_current_branch(cwd):
     try:
-        result = subprocess.check_output(['git', 'rev-parse', '--abbrev-ref', 'HEAD']).decode().strip()
+        result = subprocess.check_output(['git', 'rev-parse', '--abbrev-ref', 'HEAD'], cwd=cwd).decode().strip()
         if result == "HEAD":
-            temp = subprocess.check_output(['git', 'branch']).decode().strip().split()
+            temp = subprocess.check_output(['git', 'branch'], cwd=cwd).decode().strip().split()
             result = temp[4][:-1]        
         return result
     except subprocess.CalledProcessError:
@@ -1230,12 +1287,13 @@ def get_current_branch():
     Input('open-popup-button-2', 'n_clicks'),
     Input('close-popup-button-2', 'n_clicks'),
     Input('m1', 'n_clicks'),
-    State('popup-2', 'is_open')
+    State('popup-2', 'is_open'),
+    State('cwd', 'children')
 )
-def toggle_popup_2(open_clicks, close_clicks, m1_clicks, is_open):
+def toggle_popup_2(open_clicks, close_clicks, m1_clicks, is_open, cwd):
     if open_clicks:
-        branch = find_branch_merge()
-        current_branch = get_current_branch()  # Get the current branch
+        branch = find_branch_merge(cwd)
+        current_branch = get_current_branch(cwd)  # Get the current branch
         return True, branch, "", 0, 0, f"✡ 현재 Branch: {current_branch}"  # Update the 'current_branch' div content
     return False, [], "", 0, 0, ""  # Return an empty string for 'current_branch' if the popup is closed
 
@@ -1244,43 +1302,45 @@ def toggle_popup_2(open_clicks, close_clicks, m1_clicks, is_open):
     Output('m1', 'n_clicks'),
     Output('merge_popup', 'is_open'),
     Output('merge_popup', 'children'),
-    Output('dummy12', 'n_clicks'),
+    Output('repo_version', 'data', allow_duplicate=True),
     Input('merge_branch', 'n_clicks'),
     State('branch_dropdown-2', 'value'),
     State('cwd', 'children'),
     State('m1', 'n_clicks'),
-    State('dummy12', 'n_clicks'),
+    prevent_initial_call=True
 )
-def merge_branch(click, value, cwd, m1_clicks, d_clk):
+def merge_branch(click, value, cwd, m1_clicks):
     if click is not None and click > 0:
         if value:
             if value[0] == "*":
                 value = value[1:].strip()
-            os.system('cd ' + str(Path(cwd)))
             command = ["git", "merge", value]
-            result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, encoding='utf-8')
+            result = subprocess.run(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, encoding='utf-8')
+            invalidate_snapshot(cwd)
             if result.stdout:
-                return m1_clicks + 1, True, result.stdout, d_clk + 1
+                return m1_clicks + 1, True, result.stdout, repo_state.bump(cwd)
             elif result.stderr:
-                return m1_clicks + 1, True, result.stderr, d_clk + 1
-    return m1_clicks, False, '', d_clk
+                return m1_clicks + 1, True, result.stderr, repo_state.bump(cwd)
+    return m1_clicks, False, '', no_update
 
 
 # 주어진 커밋의 자세한 정보를 반환하는 함수
 # %an은 작성자 이름, #ae는 작성자 이메일, %ad는 작성일자, %s는 커밋 메시지
-def get_commit_info(commit):
+def get_commit_info(commit, cwd):
     command = ['git', 'show', '--no-patch', '--format="%an <%ae>%n%ad%n%s"', commit]
-    commit_info = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, encoding='utf-8').stdout
+    commit_info = subprocess.run(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                 encoding='utf-8').stdout
     return commit_info
 
 
 # 주어진 커밋과 이전 커밋의 차이를 반환하는 함수
-def get_commit_diff(commit):
+def get_commit_diff(commit, cwd):
     # commit 간의 변경사항 간략히 출력
     command = ['git', 'diff', '--stat', commit + '^', commit]
     # commit 간의 변경사항 전체 출력
     # command = ['git', 'diff', commit + '^', commit]
-    diff_output = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, encoding='utf-8').stdout
+    diff_output = subprocess.run(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                 encoding='utf-8').stdout
     return diff_output
 
 
@@ -1305,9 +1365,9 @@ def show_commit_info(root, commit_info, diff_info):
     diff_text.pack()
 
 
-def node_clicked(root, node):
-    commit_info = get_commit_info(node)
-    commit_diff = get_commit_diff(node)
+def node_clicked(root, node, cwd):
+    commit_info = get_commit_info(node, cwd)
+    commit_diff = get_commit_diff(node, cwd)
     show_commit_info(root, commit_info, commit_diff)
 
 
@@ -1318,8 +1378,7 @@ def node_clicked(root, node):
 )
 def commit_graph(n_clicks, cwd):
     if n_clicks:
-        os.system("cd " + str(Path(cwd)))
-        result = subprocess.run(['git', 'log', '--pretty=oneline', '--graph'], stdout=subprocess.PIPE,
+        result = subprocess.run(['git', 'log', '--pretty=oneline', '--graph'], cwd=cwd, stdout=subprocess.PIPE,
                                 stderr=subprocess.PIPE)
         output = result.stdout.decode()  # stdout를 문자열로 변환
         lines = output.split('\n')  # 문자열을 "\n"으로 분리
@@ -1354,11 +1413,11 @@ def commit_graph(n_clicks, cwd):
             rectangle = canvas.create_rectangle(y, x, y + 50, x + 50, fill='white')  # 사각형 생성
             rectangles[location[(x, y)]] = rectangle  # 사각형을 저장
             canvas.tag_bind(rectangle, '<Button-1>',
-                            lambda event, node=location[(x, y)]: node_clicked(root, node))  # 클릭 이벤트 바인딩
+                            lambda event, node=location[(x, y)]: node_clicked(root, node, cwd))  # 클릭 이벤트 바인딩
             text = location[(x, y)][:6]  # 사각형에 표시할 텍스트
             canvas.create_text(y + 25, x + 25, text=text)  # 사각형 중앙에 텍스트 그리기
             # 작성자 이름과 메시지 표시
-            commit_info = get_commit_info(location[(x, y)])
+            commit_info = get_commit_info(location[(x, y)], cwd)
             author, date, message = commit_info.strip().split('\n')
             info_text = f'{author}\n{message}'
             canvas.create_text(y + 75, x + 25, text=info_text, anchor='w')
@@ -1376,8 +1435,7 @@ def commit_graph(n_clicks, cwd):
 
 
 def find_parent(cwd):
-    os.system("cd " + str(Path(cwd)))
-    result = subprocess.run(["git", "log", "--pretty=format:%H %P"], stdout=subprocess.PIPE,
+    result = subprocess.run(["git", "log", "--pretty=format:%H %P"], cwd=cwd, stdout=subprocess.PIPE,
                             stderr=subprocess.PIPE, encoding='utf-8').stdout
     parent_dict = {}
     if not result:
@@ -1390,5 +1448,9 @@ def find_parent(cwd):
     return parent_dict
 
 
+# serve_layout이 쓰는 함수들이 모두 정의된 뒤에 설정 (Dash가 설정할 때 한 번 호출함)
+app.layout = serve_layout
+
+
 if __name__ == '__main__':
-    app.run_server(debug=True)
+    app.run(debug=True, threaded=True)
@@ -0,0 +1,287 @@
+/*
+ * Virtualized file table.
+ *
+ * list_cwd_files (app.py) sends one listing page as columns (names, type
+ * codes, sizes, times, icon/status/badge indexes) in the `listing_data`
+ * store. Only the rows inside the scrolled window of #cwd_files (plus a few
+ * above and below) exist in the DOM; they are redrawn on scroll.
+ *
+ * Clicking a name sets `stored_cwd`; the checkboxes update `selected` (a
+ * list of names, kept across pages). The type and git status code of every
+ * row seen in the current directory are remembered, so the state of the
+ * git action buttons for the selection is computed here (`buttons`).
+ *
+ * The first page is part of the served layout, so it is drawn without
+ * waiting for a callback. The first draw with rows is recorded as the
+ * `listing-first-paint` performance mark (ms since navigation start), e.g.
+ * performance.getEntriesByName('listing-first-paint')[0].startTime.
+ */
+(function () {
+    var ROW_HEIGHT = 32;
+    var OVERSCAN = 10;
+    var MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+                  'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'];
+    var SVG_NS = 'http://www.w3.org/2000/svg';
+    var COLUMNS = ['', '', 'filename', 'size', 'created', 'modified', 'status'];
+    var MODIFIED = [' M', 'MM', 'TM', 'AM', 'RM', 'CM'];
+    var ADDABLE = MODIFIED.concat(['??', '*?']);
+
+    // name -> {type, code} for the rows of the current directory and
+    // repository version, across pages
+    var known = {path: null, state: null, rows: new Map()};
+
+    function remember(data) {
+        if (!data) {
+            return;
+        }
+        if (known.path !== data.path || known.state !== data.state) {
+            known = {path: data.path, state: data.state, rows: new Map()};
+        }
+        for (var i = 0; i < data.names.length; i++) {
+            known.rows.set(data.names[i], {type: data.types.charAt(i), code: data.code_table[data.codes[i]]});
+        }
+    }
+
+    function every(values, allowed) {
+        return values.length > 0 && values.every(function (value) {
+            return allowed.indexOf(value) !== -1;
+        });
+    }
+
+    // same rules as the former server side `check` callback
+    function buttonStates(nClicks, info, selected, data) {
+        var T = true;
+        if (!info || !info.is_dir) {
+            return [T, 'file', T, T, T, T, T, T, T, 0, T, T, T, T];
+        }
+        var isGit = Boolean(info.is_git);
+        var msg = isGit ? 'current branch: ' + (info.branch || '') : 'not git repo';
+        var branchFlag = !isGit;
+        var base = [isGit, msg, T, T, T, T, T, T, T, 0, branchFlag, branchFlag, branchFlag, !branchFlag];
+        if (nClicks !== 1) {
+            return base;
+        }
+        remember(data);
+        var states = [];
+        var names = selected || [];
+        for (var i = 0; i < names.length; i++) {
+            var row = known.rows.get(names[i]);
+            if (!row) {
+                continue;
+            }
+            if (row.type === 'd') {
+                return base;
+            }
+            states.push(row.code);
+        }
+        if (states.length === 0 || !isGit) {
+            return base;
+        }
+        // committed
+        if (every(states, [''])) {
+            var single = states.length === 1;  // rename only for one file
+            return base.slice(0, 2).concat([T, T, T, false, false, !single, !single]).concat(base.slice(9));
+        }
+        var btn = base.slice();
+        var allStaged = true;
+        for (var j = 0; j < states.length; j++) {
+            if (states[j].length === 0) {
+                break;
+            }
+            if (' ?!'.indexOf(states[j].charAt(0)) !== -1) {
+                allStaged = false;
+                break;
+            }
+        }
+        if (allStaged) {
+            btn[4] = false;
+        }
+        if (every(states, MODIFIED)) {
+            btn[2] = false;
+            btn[3] = false;
+        } else if (every(states, ADDABLE)) {
+            btn[2] = false;
+        }
+        return btn;
+    }
+
+    function pad(n) {
+        return n < 10 ? '0' + n : String(n);
+    }
+
+    // same format as the server used: 'Oct 18, 2026 06:20'
+    function formatMinutes(minutes) {
+        var d = new Date(minutes * 60000);
+        return MONTHS[d.getMonth()] + ' ' + pad(d.getDate()) + ', ' + d.getFullYear() + ' ' +
+            pad(d.getHours()) + ':' + pad(d.getMinutes());
+    }
+
+    function fullPath(data, name) {
+        var path = data.path;
+        return path.charAt(path.length - 1) === data.sep ? path + name : path + data.sep + name;
+    }
+
+    function cell(row, className, text) {
+        var div = document.createElement('div');
+        div.className = 'listing-cell ' + className;
+        if (text !== undefined) {
+            div.textContent = text;
+        }
+        row.appendChild(div);
+        return div;
+    }
+
+    function Grid(container) {
+        this.container = container;
+        this.data = null;
+        this.selected = new Set();
+        this.header = document.createElement('div');
+        this.header.className = 'listing-row listing-header';
+        this.body = document.createElement('div');
+        this.body.className = 'listing-body';
+        container.innerHTML = '';
+        container.appendChild(this.header);
+        container.appendChild(this.body);
+        container.addEventListener('scroll', this.draw.bind(this));
+        this.body.addEventListener('click', this.onClick.bind(this));
+        this.body.addEventListener('change', this.onChange.bind(this));
+        this.first = -1;
+        this.last = -1;
+    }
+
+    Grid.prototype.setData = function (data, selected) {
+        var moved = !this.data || !data || this.data.path !== data.path || this.data.start !== data.start;
+        this.data = data;
+        this.selected = new Set(selected || []);
+        this.header.innerHTML = '';
+        var columns = data && data.git ? COLUMNS : COLUMNS.slice(0, -1);
+        this.container.classList.toggle('listing-git', Boolean(data && data.git));
+        for (var i = 0; i < columns.length; i++) {
+            cell(this.header, 'listing-col-' + i, columns[i]);
+        }
+        this.body.style.height = (data ? data.names.length * ROW_HEIGHT : 0) + 'px';
+        if (moved) {
+            this.container.scrollTop = 0;
+        }
+        this.first = this.last = -1;
+        this.draw();
+    };
+
+    Grid.prototype.draw = function () {
+        var data = this.data;
+        if (!data) {
+            this.body.innerHTML = '';
+            return;
+        }
+        var top = this.container.scrollTop;
+        var first = Math.max(0, Math.floor(top / ROW_HEIGHT) - OVERSCAN);
+        var last = Math.min(data.names.length,
+            Math.ceil((top + this.container.clientHeight) / ROW_HEIGHT) + OVERSCAN);
+        if (first === this.first && last === this.last) {
+            return;
+        }
+        this.first = first;
+        this.last = last;
+        var fragment = document.createDocumentFragment();
+        for (var i = first; i < last; i++) {
+            fragment.appendChild(this.row(i));
+        }
+        this.body.innerHTML = '';
+        this.body.appendChild(fragment);
+    };
+
+    Grid.prototype.row = function (i) {
+        var data = this.data;
+        var name = data.names[i];
+        var type = data.types.charAt(i);
+        var row = document.createElement('div');
+        row.className = 'listing-row';
+        row.style.top = (i * ROW_HEIGHT) + 'px';
+        row.dataset.index = i;
+
+        var box = document.createElement('input');
+        box.type = 'checkbox';
+        box.checked = this.selected.has(name);
+        cell(row, 'listing-col-0').appendChild(box);
+
+        // one cached sprite file for all icons (sprite.py)
+        var icon = document.createElementNS(SVG_NS, 'svg');
+        var size = type === 'd' ? 25 : 24;
+        icon.setAttribute('width', size);
+        icon.setAttribute('height', size);
+        var use = document.createElementNS(SVG_NS, 'use');
+        use.setAttribute('href', data.sprite + '#' + data.icon_table[data.icons[i]]);
+        icon.appendChild(use);
+        cell(row, 'listing-col-1').appendChild(icon);
+
+        var link = document.createElement('a');
+        link.href = '#';
+        link.title = fullPath(data, name);
+        link.textContent = name;
+        if (type === 'd') {
+            link.className = 'listing-dir';
+        }
+        var nameCell = cell(row, 'listing-col-2');
+        nameCell.appendChild(link);
+        var badge = data.badges[i];
+        if (badge !== undefined) {
+            var span = document.createElement('span');
+            span.className = 'badge bg-secondary ms-2';
+            span.textContent = data.badge_table[badge];
+            nameCell.appendChild(span);
+        }
+
+        var mtime = data.time_base + data.mtimes[i];
+        cell(row, 'listing-col-3', data.sizes[i].toLocaleString('en-US'));
+        cell(row, 'listing-col-4', formatMinutes(mtime + data.ctimes[i]));
+        cell(row, 'listing-col-5', formatMinutes(mtime));
+        if (data.git) {
+            cell(row, 'listing-col-6', data.status_table[data.status[i]]);
+        }
+        return row;
+    };
+
+    Grid.prototype.onClick = function (event) {
+        var link = event.target.closest('a');
+        if (!link) {
+            return;
+        }
+        event.preventDefault();
+        window.dash_clientside.set_props('stored_cwd', {data: link.title});
+    };
+
+    Grid.prototype.onChange = function (event) {
+        var row = event.target.closest('.listing-row');
+        if (!row || event.target.type !== 'checkbox') {
+            return;
+        }
+        var name = this.data.names[Number(row.dataset.index)];
+        if (event.target.checked) {
+            this.selected.add(name);
+        } else {
+            this.selected.delete(name);
+        }
+        window.dash_clientside.set_props('selected', {data: Array.from(this.selected).sort()});
+    };
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        listing: {
+            render: function (data, selected) {
+                var container = document.getElementById('cwd_files');
+                if (!container) {
+                    return window.dash_clientside.no_update;
+                }
+                if (!container._grid) {
+                    container._grid = new Grid(container);
+                }
+                remember(data);
+                container._grid.setData(data, selected);
+                if (data && !performance.getEntriesByName('listing-first-paint').length) {
+                    performance.mark('listing-first-paint');
+                }
+                return data ? data.names.length : 0;
+            },
+            buttons: buttonStates
+        }
+    });
+})();
@@ -0,0 +1,215 @@
+"""
+Compression and conditional responses for the Flask server.
+
+Responses of a compressible type and at least `COMPRESS_MIN_SIZE` bytes
+are sent gzip- or brotli-encoded, whichever the browser accepts (brotli
+only if the `brotli` package is installed). Static files (Dash assets,
+the icon sprite) are compressed once and kept under `PRECOMPRESSED_DIR`
+until the file changes; `python compression.py` compresses them ahead of
+time. Asset URLs fingerprinted by Dash (`?m=<mtime>`) are cached by the
+browser for `ASSET_MAX_AGE`.
+
+The layout (`_dash-layout`, which holds the first listing page) gets an
+ETag of its content; a request whose If-None-Match matches it is answered
+with 304 and no body. Unchanged listing callbacks are dropped by
+list_cwd_files itself (204).
+"""
+import gzip
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESS_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+COMPRESS_TYPES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+PRECOMPRESSED_DIR = Path(__file__).with_name('build') / 'precompressed'
+ASSET_MAX_AGE = 365 * 24 * 3600
+# GET responses only: browsers do not revalidate the renderer's POST requests
+ETAG_PATHS = ('/_dash-layout',)
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def accepted_encoding(header):
+    """'br' or 'gzip' from an Accept-Encoding header (highest q, br on a tie), or None."""
+    best, best_q = None, 0.0
+    for item in (header or '').split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if name not in SUFFIXES or (name == 'br' and brotli is None):
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q > best_q or (q == best_q and name == 'br'):
+            best, best_q = name, q
+    return best
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, GZIP_LEVEL, mtime=0)
+
+
+def precompressed(source, key, encoding, out_dir=PRECOMPRESSED_DIR):
+    """Compressed bytes of file `source`, stored as `out_dir/key` plus .gz/.br
+    and rewritten when `source` is newer. If `out_dir` cannot be written
+    the bytes are compressed on every call instead."""
+    target = out_dir / (key + SUFFIXES[encoding])
+    try:
+        if target.stat().st_mtime >= source.stat().st_mtime:
+            return target.read_bytes()
+    except OSError:
+        pass
+    data = compress(source.read_bytes(), encoding)
+    tmp = target.with_name(f'{target.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_bytes(data)
+        os.replace(tmp, target)
+    except OSError:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+    return data
+
+
+class Compressor:
+    """after_request hook of the Flask server.
+
+    Attributes:
+    -----------
+    static_dirs : endpoint -> directory of the files it serves (the view
+                  argument `arg` is the file name)
+    responses : number of compressed responses
+    bytes_in / bytes_out : sizes before and after compression
+    seconds : time spent compressing dynamic responses
+    not_modified : 304 answers to If-None-Match
+    """
+
+    def __init__(self):
+        self.static_dirs = {}
+        self.responses = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, server):
+        server.after_request(self.after_request)
+
+    def static(self, endpoint, directory, arg='filename'):
+        """Serve the files of `endpoint` precompressed."""
+        self.static_dirs[endpoint] = (Path(directory), arg)
+
+    def _count(self, before, after, seconds=0.0):
+        with self._lock:
+            self.responses += 1
+            self.bytes_in += before
+            self.bytes_out += after
+            self.seconds += seconds
+
+    def after_request(self, response):
+        if response.status_code != 200 or 'Content-Encoding' in response.headers:
+            return response
+        if request.endpoint in self.static_dirs:
+            return self._static(response)
+        if request.path.endswith(ETAG_PATHS):
+            response = self._conditional(response)
+            if response.status_code != 200:
+                return response
+        if not (response.mimetype or '').startswith(COMPRESS_TYPES):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = accepted_encoding(request.headers.get('Accept-Encoding'))
+        data = response.get_data()
+        if encoding is None or len(data) < COMPRESS_MIN_SIZE:
+            return response
+        start = time.perf_counter()
+        compressed = compress(data, encoding)
+        self._count(len(data), len(compressed), time.perf_counter() - start)
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def _conditional(self, response):
+        # weak ETag: the same content may be sent with different encodings
+        response.set_etag(hashlib.sha1(response.get_data()).hexdigest()[:20], weak=True)
+        etag = response.get_etag()[0]
+        if request.if_none_match.contains_weak(etag):
+            with self._lock:
+                self.not_modified += 1
+            response.status_code = 304
+            response.set_data(b'')
+            for header in ('Content-Type', 'Content-Length'):
+                response.headers.pop(header, None)
+        return response
+
+    def _static(self, response):
+        if 'm' in request.args:
+            # Dash changes ?m= when the file changes
+            response.cache_control.public = True
+            response.cache_control.max_age = ASSET_MAX_AGE
+            response.cache_control.immutable = True
+            response.cache_control.no_cache = None
+        if not (response.mimetype or '').startswith(COMPRESS_TYPES):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = accepted_encoding(request.headers.get('Accept-Encoding'))
+        if encoding is None or request.range is not None:
+            return response
+        directory, arg = self.static_dirs[request.endpoint]
+        name = request.view_args.get(arg, '')
+        source = (directory / name).resolve()
+        if directory.resolve() not in source.parents or not source.is_file():
+            return response
+        size = source.stat().st_size
+        if size < COMPRESS_MIN_SIZE:
+            return response
+        data = precompressed(source, f'{request.endpoint}/{name}', encoding)
+        self._count(size, len(data))
+        response.close()
+        response.direct_passthrough = False
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f'{etag}-{encoding}', weak)
+        return response
+
+    def stats(self):
+        return {'responses': self.responses, 'bytes_in': self.bytes_in, 'bytes_out': self.bytes_out,
+                'seconds': round(self.seconds, 3), 'not_modified': self.not_modified}
+
+
+compressor = Compressor()
+
+
+if __name__ == '__main__':
+    from sprite import build_sprite
+    assets = Path(__file__).with_name('assets')
+    sources = [('_dash_assets.static', assets, path) for path in sorted(assets.glob('*'))
+               if path.suffix in ('.js', '.css')]
+    sprite = build_sprite()
+    sources.append(('serve_sprite', sprite.parent, sprite))
+    encodings = [encoding for encoding in SUFFIXES if encoding != 'br' or brotli is not None]
+    for endpoint, directory, path in sources:
+        for encoding in encodings:
+            data = precompressed(path, f'{endpoint}/{path.relative_to(directory).as_posix()}', encoding)
+            print(f'{path.name} ({encoding}): {path.stat().st_size:,} -> {len(data):,} bytes')
@@ -0,0 +1,301 @@
+"""
+Read-only access to the git index (``.git/index``) without running git.
+
+The index is memory-mapped and its entries (versions 2, 3 and 4, including
+the path prefix compression of version 4) are kept as a compact set of
+arrays. Comparing the cached stat data of the entries with the stat data
+of a directory listing tells which files of a directory are clean,
+possibly modified or untracked; only racily clean entries need git to
+decide.
+"""
+import mmap
+import os
+import stat
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from typing import NamedTuple
+
+from listing import parallel_stat, stat_pool
+
+CLEAN = 'clean'
+MODIFIED = 'modified'
+DELETED = 'deleted'
+UNTRACKED = 'untracked'
+RACY = 'racy'
+
+_ENTRY = struct.Struct('>10I')  # ctime s/ns, mtime s/ns, dev, ino, mode, uid, gid, size
+_STAGE_MASK = 0x3000
+_EXTENDED = 0x4000
+_SKIP_WORKTREE = 0x4000  # extended flags
+_INTENT_TO_ADD = 0x2000  # extended flags
+
+
+class GitIndex:
+    """Tracked entries of an index file, one array slot per entry.
+
+    Attributes:
+    -----------
+    version : index format version (2, 3 or 4)
+    paths : list of repository relative paths, in index order
+    mtime_ns, size, ino, mode : stat data cached by git for every entry
+    ambiguous : 1 for conflicted, skip-worktree and intent-to-add entries
+    index_mtime_ns : mtime of the index file itself (racy-git check)
+    """
+
+    def __init__(self, version, index_mtime_ns):
+        self.version = version
+        self.index_mtime_ns = index_mtime_ns
+        self.paths = []
+        self.mtime_ns = array('q')
+        self.size = array('Q')
+        self.ino = array('Q')
+        self.mode = array('I')
+        self.ambiguous = array('B')
+        self._positions = None
+
+    def __len__(self):
+        return len(self.paths)
+
+    def position(self, path):
+        """Array slot of `path`, or None if it is not tracked."""
+        if self._positions is None:
+            self._positions = {p: i for i, p in enumerate(self.paths)}
+        return self._positions.get(path)
+
+    def has_prefix(self, prefix):
+        """True if some tracked path starts with `prefix`."""
+        i = bisect_left(self.paths, prefix)
+        return i < len(self.paths) and self.paths[i].startswith(prefix)
+
+    def children(self, prefix):
+        """Names of the tracked files directly below `prefix` ('' or 'dir/')."""
+        names = []
+        # the index is sorted by path
+        i = bisect_left(self.paths, prefix)
+        while i < len(self.paths) and self.paths[i].startswith(prefix):
+            name = self.paths[i][len(prefix):]
+            if '/' not in name:
+                names.append(name)
+            i += 1
+        return names
+
+
+def git_dir(root):
+    """The git directory of a worktree root, following '.git' files."""
+    dot_git = os.path.join(root, '.git')
+    if os.path.isfile(dot_git):
+        with open(dot_git) as f:
+            line = f.readline().strip()
+        if line.startswith('gitdir:'):
+            return os.path.normpath(os.path.join(root, line[len('gitdir:'):].strip()))
+    return dot_git
+
+
+def _hash_size(gdir):
+    try:
+        with open(os.path.join(gdir, 'config')) as f:
+            config = f.read().lower()
+    except OSError:
+        return 20
+    return 32 if 'objectformat = sha256' in config.replace('\t', ' ') else 20
+
+
+def _varint(buf, pos):
+    # offset encoding used for the v4 prefix length
+    byte = buf[pos]
+    pos += 1
+    value = byte & 0x7f
+    while byte & 0x80:
+        byte = buf[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (byte & 0x7f)
+    return value, pos
+
+
+def read_index(path, hash_size=20):
+    """Parse the index file at `path`. Returns a GitIndex, or None if the
+    file is missing or not an index of a supported version."""
+    try:
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            if st.st_size < 12:
+                return None
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        if buf[:4] != b'DIRC':
+            return None
+        version, count = struct.unpack_from('>II', buf, 4)
+        if version not in (2, 3, 4):
+            return None
+        index = GitIndex(version, st.st_mtime_ns)
+        pos = 12
+        previous = b''
+        for _ in range(count):
+            start = pos
+            (_, _, mtime_s, mtime_ns, _, ino, mode, _, _, size) = _ENTRY.unpack_from(buf, pos)
+            pos += _ENTRY.size + hash_size
+            flags = struct.unpack_from('>H', buf, pos)[0]
+            pos += 2
+            ambiguous = flags & _STAGE_MASK
+            if flags & _EXTENDED:
+                ext_flags = struct.unpack_from('>H', buf, pos)[0]
+                pos += 2
+                ambiguous = ambiguous or ext_flags & (_SKIP_WORKTREE | _INTENT_TO_ADD)
+            if version == 4:
+                strip, pos = _varint(buf, pos)
+                end = buf.find(b'\0', pos)
+                name = previous[:len(previous) - strip] + buf[pos:end]
+                pos = end + 1
+                previous = name
+            else:
+                end = buf.find(b'\0', pos)
+                name = buf[pos:end]
+                # entries are NUL padded to a multiple of 8 bytes
+                pos = start + ((end - start) // 8 + 1) * 8
+            index.paths.append(name.decode('utf-8', 'surrogateescape'))
+            index.mtime_ns.append(mtime_s * 1000000000 + mtime_ns)
+            index.size.append(size)
+            index.ino.append(ino)
+            index.mode.append(mode)
+            index.ambiguous.append(1 if ambiguous else 0)
+        return index
+    except (struct.error, IndexError):
+        return None
+    finally:
+        buf.close()
+
+
+_cache = {}  # index path -> ((mtime_ns, size), GitIndex)
+_cache_lock = threading.Lock()
+
+
+def load_index(root):
+    """GitIndex of the repository at `root`, re-read only when the index
+    file changed."""
+    gdir = git_dir(root)
+    path = os.path.join(gdir, 'index')
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = (st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        cached = _cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    index = read_index(path, _hash_size(gdir))
+    with _cache_lock:
+        _cache[path] = (key, index)
+    return index
+
+
+def _mode_changed(cached, mode):
+    # git keeps only the exec bit of regular files; a symlink is stored as
+    # 0o120000 while lstat() reports 0o120777
+    if stat.S_ISREG(mode):
+        return stat.S_IFMT(cached) != stat.S_IFREG or (cached & 0o100) != (mode & 0o100)
+    return stat.S_IFMT(cached) != stat.S_IFMT(mode)
+
+
+def classify_entry(index, i, st):
+    """Compare the stat data git cached for slot `i` with `st`."""
+    if index.ambiguous[i]:
+        return RACY
+    if (index.size[i] != st.st_size & 0xffffffff
+            or (index.ino[i] and st.st_ino and index.ino[i] != st.st_ino & 0xffffffff)
+            or _mode_changed(index.mode[i], st.st_mode)):
+        return MODIFIED
+    cached = index.mtime_ns[i]
+    if cached % 1000000000 == 0:
+        # git built without nanosecond timestamps
+        same_mtime = cached // 1000000000 == st.st_mtime_ns // 1000000000
+    else:
+        same_mtime = cached == st.st_mtime_ns
+    if not same_mtime:
+        return MODIFIED
+    if st.st_mtime_ns >= index.index_mtime_ns:
+        # modified in the same instant the index was written: only a
+        # content comparison (git) can tell
+        return RACY
+    return CLEAN
+
+
+class _EntryStat(NamedTuple):
+    # the stat fields classify_entry() reads, taken from a listing record
+    st_size: int
+    st_mtime_ns: int
+    st_ino: int
+    st_mode: int
+
+
+def _lstat(path):
+    try:
+        return os.lstat(path)
+    except OSError:
+        return None
+
+
+def _worktree_files(path, records):
+    """name -> stat of the files directly inside `path`, or None for the
+    tracked candidates that still need an lstat()."""
+    if records is not None:
+        files = {}
+        for record in records:
+            if record.is_dir:
+                continue
+            if record.symlink_target is not None:
+                # the listing describes the link target
+                files[record.name] = None
+            else:
+                mode = stat.S_IFREG | (0o755 if record.executable else 0o644)
+                # no inode in the listing: classify_entry() skips that check
+                files[record.name] = _EntryStat(record.size, record.mtime_ns, 0, mode)
+        return files
+    with os.scandir(path) as it:
+        return {entry.name: None for entry in it if not entry.is_dir(follow_symlinks=False)}
+
+
+def classify_directory(root, path, index=None, records=None):
+    """Classify the files directly inside `path` against the index.
+
+    Returns a dict of file name -> CLEAN, MODIFIED, DELETED, UNTRACKED or
+    RACY. Subdirectories are not included. Returns None when the index
+    cannot be read.
+
+    `records` is a complete listing of `path` (listing.Listing) whose sizes,
+    mtimes and exec bits are used instead of stat-ing the files again; only
+    symlinks are lstat()ed. The stats that are needed go through the
+    listing stat pool on remote filesystems.
+    """
+    index = index or load_index(root)
+    if index is None:
+        return None
+    rel = os.path.relpath(os.path.abspath(path), root).replace(os.sep, '/')
+    prefix = '' if rel == '.' else rel + '/'
+    try:
+        files = _worktree_files(path, records)
+    except OSError:
+        return None
+    result = {}
+    missing = []
+    for name, st in files.items():
+        i = index.position(prefix + name)
+        if i is None:
+            result[name] = UNTRACKED
+        elif st is None:
+            missing.append((name, i))
+        else:
+            result[name] = classify_entry(index, i, st)
+    if missing:
+        paths = [os.path.join(path, name) for name, _ in missing]
+        stats = stat_pool().map(_lstat, paths) if parallel_stat(path) else map(_lstat, paths)
+        for (name, i), st in zip(missing, stats):
+            result[name] = RACY if st is None else classify_entry(index, i, st)
+    for name in index.children(prefix):
+        if name not in result and not os.path.isdir(os.path.join(path, name)):
+            result[name] = DELETED
+    return result
@@ -0,0 +1,671 @@
+"""
+Git status snapshots.
+
+A snapshot is the parsed output of a single
+``git status --porcelain=v2 -z`` run over a repository.  The file table and
+the action buttons look up every path they need in the snapshot instead of
+spawning one ``git status`` per file.
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from git_index import (CLEAN, DELETED, MODIFIED, RACY, UNTRACKED, classify_directory,
+                       git_dir, load_index)
+from gitignore import IgnoreMatcher
+import listing
+from repo_index import find_repo_root
+
+
+class StatusEntry:
+    """One path reported by ``git status``.
+
+    Attributes:
+    -----------
+    path : path relative to the repository root ('/' separated)
+    code : porcelain v1 style XY code, e.g. ' M', 'A ', '??', '!!'
+    orig_path : rename/copy source, or None
+    submodule : 'N...' for normal paths, 'S<c><m><u>' for submodules
+    """
+    __slots__ = ('path', 'code', 'orig_path', 'submodule')
+
+    def __init__(self, path, code, orig_path=None, submodule='N...'):
+        self.path = path
+        self.code = code
+        self.orig_path = orig_path
+        self.submodule = submodule
+
+    @property
+    def is_submodule(self):
+        return self.submodule.startswith('S')
+
+    def __repr__(self):
+        return f'StatusEntry({self.path!r}, {self.code!r})'
+
+
+def _v1_code(xy):
+    # porcelain v2 uses '.' for "unmodified", v1 uses a space
+    return xy.replace('.', ' ')
+
+
+def parse_porcelain_v2(data, headers=None):
+    """Parse the NUL separated output of ``git status --porcelain=v2 -z``.
+
+    Returns a list of StatusEntry. Header lines ('# branch.head main', ...)
+    are stored in the `headers` dict if one is given.
+    """
+    if isinstance(data, bytes):
+        data = data.decode('utf-8', 'surrogateescape')
+    fields = data.split('\0')
+    entries = []
+    i = 0
+    n = len(fields)
+    while i < n:
+        record = fields[i]
+        i += 1
+        if not record:
+            continue
+        kind = record[0]
+        if kind == '#':
+            if headers is not None:
+                key, _, value = record[2:].partition(' ')
+                headers[key] = value
+        elif kind == '1':
+            # 1 XY sub mH mI mW hH hI path
+            parts = record.split(' ', 8)
+            entries.append(StatusEntry(parts[8], _v1_code(parts[1]), submodule=parts[2]))
+        elif kind == '2':
+            # 2 XY sub mH mI mW hH hI Xscore path NUL origPath
+            parts = record.split(' ', 9)
+            orig = fields[i] if i < n else None
+            i += 1
+            entries.append(StatusEntry(parts[9], _v1_code(parts[1]), orig, submodule=parts[2]))
+        elif kind == 'u':
+            # u XY sub m1 m2 m3 mW h1 h2 h3 path
+            parts = record.split(' ', 10)
+            entries.append(StatusEntry(parts[10], _v1_code(parts[1]), submodule=parts[2]))
+        elif kind == '?':
+            entries.append(StatusEntry(record[2:].rstrip('/'), '??'))
+        elif kind == '!':
+            entries.append(StatusEntry(record[2:].rstrip('/'), '!!'))
+    return entries
+
+
+def status_meaning(code):
+    """Human readable meanings of a porcelain XY code (see git-status(1))."""
+    meaning = []
+    x, y = (code + '  ')[:2]
+    if code == '??':
+        return ['untracked']
+    if code == '!!':
+        return ['ignored']
+    if x == ' ' and y in 'AMD':
+        meaning.append('not updated')  # not staged
+    elif x == 'M' and y in ' MTD':
+        meaning.append('staged: updated in index')
+    elif x == 'T' and y in ' MTD':
+        meaning.append('staged: type change in index')
+    elif x == 'A' and y in ' MTD':
+        meaning.append('staged: added to index')
+    elif code == 'D ':
+        meaning.append('staged: deleted from index')
+    elif x == 'R' and y in ' MTD':
+        meaning.append('staged: renamed in index')
+    elif x == 'C' and y in ' MTD':
+        meaning.append('staged: copied in index')
+
+    if x in 'MTARC' and y == ' ':
+        meaning.append('index and work tree matches')
+    elif x in ' MTARC' and y == 'M':
+        meaning.append('modified in work tree since index')
+    elif x in ' MTARC' and y == 'T':
+        meaning.append('type changed in work tree since index')
+    elif x in ' MTARC' and y == 'D':
+        meaning.append('deleted from index')
+    elif code == ' R':
+        meaning.append('renamed in work tree')
+    elif code == ' C':
+        meaning.append('copied in index')
+    return meaning
+
+
+class _TrieNode:
+    __slots__ = ('children', 'codes')
+
+    def __init__(self):
+        self.children = {}
+        self.codes = Counter()  # XY code -> number of entries at or below
+
+
+class StatusTrie:
+    """Prefix trie over the snapshot paths.
+
+    Every node holds the codes of all entries at or below it, so the
+    rollup of any directory is a walk down its path components. Built in
+    one pass over the entries.
+    """
+
+    def __init__(self, entries):
+        self.root = _TrieNode()
+        for e in entries:
+            node = self.root
+            node.codes[e.code] += 1
+            for part in e.path.split('/'):
+                child = node.children.get(part)
+                if child is None:
+                    child = node.children[part] = _TrieNode()
+                node = child
+                node.codes[e.code] += 1
+
+    def node(self, rel):
+        node = self.root
+        if rel:
+            for part in rel.split('/'):
+                node = node.children.get(part)
+                if node is None:
+                    return None
+        return node
+
+
+def _node_code(node):
+    """file_status() of the path of a trie node."""
+    if sum(node.codes.values()) == 1:
+        return next(iter(node.codes))
+    if '??' in node.codes:
+        return '*?'
+    if '!!' in node.codes:
+        return '*!'
+    return '**'
+
+
+class StatusSnapshot:
+    """Parsed ``git status`` of one repository at one point in time."""
+
+    def __init__(self, root, entries, headers=None, ignore=None, scope=None):
+        self.root = root
+        self.headers = headers or {}
+        self.ignore = ignore or IgnoreMatcher(root)
+        # directory the status was limited to (a pathspec), root for all
+        self.scope = scope or root
+        self.entries = sorted(entries, key=lambda e: e.path)
+        self.by_path = {e.path: e for e in self.entries}
+        self._paths = [e.path for e in self.entries]
+        self._trie = None
+
+    @property
+    def trie(self):
+        if self._trie is None:
+            self._trie = StatusTrie(self.entries)
+        return self._trie
+
+    def covers(self, path):
+        """True if `path` lies inside the part of the worktree scanned."""
+        path = os.path.abspath(path)
+        return path == self.scope or path.startswith(self.scope.rstrip(os.sep) + os.sep)
+
+    def relpath(self, path):
+        """Repository relative, '/' separated form of an absolute path."""
+        rel = os.path.relpath(os.path.abspath(path), self.root)
+        if rel == '.':
+            return ''
+        return rel.replace(os.sep, '/')
+
+    def entries_under(self, path):
+        """All entries at `path` or below it."""
+        rel = self.relpath(path)
+        if not rel:
+            return list(self.entries)
+        result = []
+        exact = self.by_path.get(rel)
+        if exact is not None:
+            result.append(exact)
+        prefix = rel + '/'
+        i = bisect_left(self._paths, prefix)
+        while i < len(self._paths) and self._paths[i].startswith(prefix):
+            result.append(self.entries[i])
+            i += 1
+        return result
+
+    def is_ignored(self, path, is_dir=None):
+        """True for an untracked path matched by the ignore rules.
+
+        git status runs without --ignored, so ignored paths are not in the
+        snapshot and are told apart from clean ones here.
+        """
+        if is_dir is None:
+            is_dir = os.path.isdir(path)
+        return self._is_ignored(self.relpath(path), is_dir, load_index(self.root))
+
+    def _is_ignored(self, rel, is_dir, index):
+        if index is not None and (index.position(rel) is not None or index.has_prefix(rel + '/')):
+            return False
+        return self.ignore.is_ignored(rel, is_dir)
+
+    def file_status(self, path, is_dir=None):
+        """Status code of a file or directory.
+
+        '' for a clean path, '!!' for an ignored one, the XY code when
+        exactly one entry matches, and '*?', '*!' or '**' for a directory
+        with several entries (containing untracked, ignored, or only tracked
+        changes).
+        """
+        node = self.trie.node(self.relpath(path))
+        if node is None:
+            return '!!' if self.is_ignored(path, is_dir) else ''
+        return _node_code(node)
+
+    def children_status(self, path, names, is_dirs):
+        """file_status() of the entries `names` directly inside directory
+        `path`, and directory_status() for the directories among them.
+
+        One trie walk and one index lookup for the whole list instead of one
+        per entry. Returns two lists parallel to `names`.
+        """
+        rel = self.relpath(path)
+        parent = self.trie.node(rel)
+        prefix = rel + '/' if rel else ''
+        index = False  # loaded on the first clean entry
+        codes, dir_codes = [], []
+        for name, is_dir in zip(names, is_dirs):
+            node = parent.children.get(name) if parent is not None else None
+            if node is None:
+                if index is False:
+                    index = load_index(self.root)
+                code = '!!' if self._is_ignored(prefix + name, is_dir, index) else ''
+                codes.append(code)
+                dir_codes.append(code)
+            else:
+                codes.append(_node_code(node))
+                dir_codes.append(node.codes.most_common(1)[0][0] if is_dir else '')
+        return codes, dir_codes
+
+    def directory_status(self, path):
+        """Most common XY code below a directory, '' if it is clean and
+        '!!' if it is ignored (without looking inside)."""
+        node = self.trie.node(self.relpath(path))
+        if node is None or not node.codes:
+            return '!!' if self.is_ignored(path, True) else ''
+        return node.codes.most_common(1)[0][0]
+
+    def status_meaning(self, path):
+        meaning = []
+        for e in self.entries_under(path):
+            meaning.extend(status_meaning(e.code))
+        return meaning
+
+    def format_status(self):
+        """A short, `git status` like summary of the snapshot."""
+        head = self.headers.get('branch.head', '')
+        lines = ['HEAD detached' if head == '(detached)' else f'On branch {head}']
+        staged = [e for e in self.entries if e.code[0] not in ' ?!']
+        unstaged = [e for e in self.entries if e.code[0] not in '?!' and e.code[1] != ' ']
+        untracked = [e for e in self.entries if e.code == '??']
+        for title, group, column in (('Changes to be committed:', staged, 0),
+                                     ('Changes not staged for commit:', unstaged, 1),
+                                     ('Untracked files:', untracked, None)):
+            if group:
+                lines.append(title)
+                for e in group:
+                    prefix = f'{e.code[column]} ' if column is not None else ''
+                    lines.append(f'    {prefix}{e.path}')
+        if not (staged or unstaged or untracked):
+            lines.append('nothing to commit, working tree clean')
+        return '\n'.join(lines)
+
+
+def overlay_snapshot(snapshot, path, records=None, untracked_only=False):
+    """Refresh the status of the files directly inside `path` from the index.
+
+    `snapshot` must have been taken against the current index and HEAD, so
+    its staged (X) column is still valid; the worktree (Y) column of the
+    files in `path` is recomputed from their stat data. Returns a new
+    StatusSnapshot, `snapshot` itself if the index cannot be read, or None
+    if an entry is racily clean and git has to decide. `records` is a
+    complete listing of `path` to take the stat data from (see
+    classify_directory).
+
+    With `untracked_only` (a snapshot git just took with -uno) the tracked
+    files keep git's status and only the untracked ones are added.
+    """
+    classes = classify_directory(snapshot.root, path, records=records)
+    if classes is None:
+        return snapshot
+    if untracked_only:
+        classes = {name: cls for name, cls in classes.items() if cls == UNTRACKED}
+    elif RACY in classes.values():
+        return None
+    rel = snapshot.relpath(path)
+    prefix = rel + '/' if rel else ''
+    entries = []
+    previous = {}
+    for e in snapshot.entries:
+        name = e.path[len(prefix):] if e.path.startswith(prefix) else None
+        if name is not None and name in classes:
+            previous[name] = e
+        else:
+            entries.append(e)
+    for name, cls in classes.items():
+        old = previous.get(name)
+        if cls == UNTRACKED:
+            # ignored files are left out, as in the snapshot itself
+            code = '  ' if snapshot.ignore.is_ignored(prefix + name) else '??'
+        else:
+            x = old.code[0] if old is not None and old.code != '??' else ' '
+            y = {CLEAN: ' ', MODIFIED: 'M', DELETED: 'D'}[cls]
+            code = x + y
+        if code != '  ':
+            orig = old.orig_path if old is not None else None
+            entries.append(StatusEntry(prefix + name, code, orig))
+    return StatusSnapshot(snapshot.root, entries, snapshot.headers, snapshot.ignore, snapshot.scope)
+
+
+# Repositories with at least SHARD_MIN_ENTRIES tracked files are scanned
+# by up to STATUS_WORKERS concurrent `git status` processes, one per group
+# of top-level pathspecs. Smaller repositories use a single process.
+STATUS_WORKERS = min(8, os.cpu_count() or 1)
+SHARD_MIN_ENTRIES = 50000
+
+# ignored paths are classified by gitignore.IgnoreMatcher instead, which
+# keeps git out of ignored trees such as node_modules
+STATUS_ARGS = ['git', 'status', '--porcelain=v2', '-z']
+
+# Untracked files scan mode passed as -u<mode>: 'no', 'normal' or 'all'.
+# 'normal' reports untracked directories as one entry, which is all the
+# folder rows need; with 'no' untracked files are still found in the listed
+# directory itself from the index (overlay_snapshot), but not in folders.
+UNTRACKED_MODE = 'normal'
+
+# Turn on core.untrackedCache (and core.fsmonitor where available) the
+# first time a repository is browsed; see enable_acceleration().
+AUTO_ACCELERATE = False
+
+# Recent `git status` durations in seconds, per (untracked mode, scope)
+# where scope is 'repo' or 'subtree'.
+status_timings = defaultdict(lambda: deque(maxlen=50))
+
+
+def timing_summary():
+    """Average and last `git status` duration per mode."""
+    return {f'{mode}/{scope}': {'runs': len(times), 'avg': sum(times) / len(times), 'last': times[-1]}
+            for (mode, scope), times in status_timings.items() if times}
+
+
+def index_entry_count(root):
+    """Number of entries in the index, read from its 12 byte header."""
+    try:
+        with open(os.path.join(git_dir(root), 'index'), 'rb') as f:
+            header = f.read(12)
+    except OSError:
+        return 0
+    if len(header) < 12 or header[:4] != b'DIRC':
+        return 0
+    return int.from_bytes(header[8:12], 'big')
+
+
+def _run_status(root, args):
+    result = subprocess.run(args, cwd=root, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        return None
+    return result.stdout
+
+
+def shard_pathspecs(root, workers):
+    """Split a worktree into at most `workers` groups of pathspecs.
+
+    Top-level directories are spread over the first groups; the last group
+    is everything else (top-level files, deleted paths), so together the
+    groups cover the whole repository. A rename whose source and target
+    land in different groups shows up as a delete plus an add.
+    """
+    try:
+        dirs = sorted(e.name for e in os.scandir(root) if e.is_dir(follow_symlinks=False) and e.name != '.git')
+    except OSError:
+        return []
+    shards = [[':(literal)' + name for name in dirs[i::workers - 1]] for i in range(workers - 1)]
+    rest = ['.'] + [':(exclude,literal)' + name for name in dirs]
+    return [shard for shard in shards if shard] + [rest]
+
+
+def _take_sharded(root, workers, args):
+    shards = shard_pathspecs(root, workers)
+    if len(shards) < 2:
+        return None
+    # --no-optional-locks: shards must not race each other for index.lock
+    base = ['git', '--no-optional-locks'] + args[1:]
+    jobs = [base + ['--'] + shard for shard in shards[:-1]] + [base + ['--branch', '--'] + shards[-1]]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        outputs = list(pool.map(lambda args: _run_status(root, args), jobs))
+    if any(out is None for out in outputs):
+        return None
+    headers = {}
+    entries = []
+    for out in outputs:
+        entries.extend(parse_porcelain_v2(out, headers))
+    return StatusSnapshot(root, entries, headers)
+
+
+def take_snapshot(path, workers=None, untracked=None, scope=None):
+    """Run ``git status`` once for the repository containing `path`.
+
+    `scope` limits the status to one directory of the worktree (the
+    listing only shows that part). Whole-repository snapshots of large
+    repositories (see SHARD_MIN_ENTRIES) are split into pathspec shards run
+    on up to `workers` processes (default STATUS_WORKERS). `untracked` is
+    the -u mode, default UNTRACKED_MODE.
+    Returns a StatusSnapshot, or None if `path` is not inside a repository.
+    """
+    root = find_repo_root(path)
+    if root is None:
+        return None
+    scope = os.path.abspath(scope) if scope else root
+    untracked = untracked or UNTRACKED_MODE
+    args = STATUS_ARGS + ['-u' + untracked]
+    workers = STATUS_WORKERS if workers is None else workers
+    if scope != root:
+        empty = StatusSnapshot(root, [], scope=scope)
+        if empty.is_ignored(scope, True):
+            # nothing below an ignored directory can show up in git status
+            return empty
+    start = time.perf_counter()
+    snapshot = None
+    if scope == root and workers > 1 and index_entry_count(root) >= SHARD_MIN_ENTRIES:
+        snapshot = _take_sharded(root, workers, args)
+    if snapshot is None:
+        pathspec = []
+        if scope != root:
+            pathspec = ['--', ':(literal)' + os.path.relpath(scope, root).replace(os.sep, '/')]
+        out = _run_status(root, args + ['--branch'] + pathspec)
+        if out is None:
+            return None
+        headers = {}
+        entries = parse_porcelain_v2(out, headers)
+        snapshot = StatusSnapshot(root, entries, headers, scope=scope)
+    status_timings[untracked, 'repo' if scope == root else 'subtree'].append(time.perf_counter() - start)
+    return snapshot
+
+
+def _git_config(root, key):
+    result = subprocess.run(['git', 'config', '--get', key], cwd=root,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, encoding='utf-8')
+    return result.stdout.strip() or None
+
+
+def fsmonitor_supported():
+    """git's builtin fsmonitor daemon exists on macOS and Windows only."""
+    return sys.platform in ('darwin', 'win32')
+
+
+def acceleration_settings(root):
+    """Current core.untrackedCache and core.fsmonitor of a repository."""
+    return {'untrackedCache': _git_config(root, 'core.untrackedCache'),
+            'fsmonitor': _git_config(root, 'core.fsmonitor')}
+
+
+def enable_acceleration(path):
+    """Turn on the untracked cache (and fsmonitor where git supports it)
+    for the repository containing `path`.
+
+    Returns the settings and the `git status` time before and after, e.g.
+    {'untrackedCache': 'true', 'fsmonitor': None, 'before': 1.2, 'after': 0.3}.
+    """
+    root = find_repo_root(path)
+    if root is None:
+        return None
+
+    def timed():
+        start = time.perf_counter()
+        _run_status(root, STATUS_ARGS + ['-u' + UNTRACKED_MODE])
+        return time.perf_counter() - start
+
+    before = timed()
+    subprocess.run(['git', 'config', 'core.untrackedCache', 'true'], cwd=root)
+    subprocess.run(['git', 'update-index', '--untracked-cache'], cwd=root,
+                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if fsmonitor_supported():
+        subprocess.run(['git', 'config', 'core.fsmonitor', 'true'], cwd=root)
+    # the first run populates the cache
+    timed()
+    report = acceleration_settings(root)
+    report.update(before=before, after=timed())
+    return report
+
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _read(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def repository_state(root):
+    """Cache key of a repository: .git/index mtime/size and HEAD contents
+    (plus the ref it points to)."""
+    gdir = git_dir(root)
+    head = _read(os.path.join(gdir, 'HEAD')) or b''
+    ref = None
+    if head.startswith(b'ref:'):
+        ref_name = head[4:].strip().decode('utf-8', 'surrogateescape')
+        ref = _read(os.path.join(gdir, ref_name)) or _stat_key(os.path.join(gdir, 'packed-refs'))
+    return _stat_key(os.path.join(gdir, 'index')), head, ref
+
+
+def _checked_key(path):
+    """(path, directory_key) that an overlay of `path` stays valid for, or
+    None while the directory may still change within the same mtime tick."""
+    path = os.path.abspath(path)
+    try:
+        key = listing.directory_key(path)
+    except OSError:
+        return None
+    if time.time_ns() - key[0] <= listing.RACY_WINDOW * 1e9:
+        return None
+    return path, key
+
+
+class SnapshotCache:
+    """LRU cache of status snapshots, one per repository.
+
+    A cached snapshot is served while its repository_state() is unchanged,
+    it is younger than `ttl` seconds and it covers the requested directory
+    (snapshots are limited to the directory being listed). The files of the
+    requested directory are re-checked against the index (overlay_snapshot)
+    when a hit finds the directory_key() of the directory changed since the
+    last check, and a racily clean file forces a new `git status`. Files
+    rewritten in place, like changes deeper in the tree, show up once the
+    snapshot expires.
+    """
+
+    def __init__(self, maxsize=8, ttl=5.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # root -> (state, created, snapshot, (path, directory_key) the
+        # snapshot is up to date for, or None)
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._accelerated = set()
+        self.acceleration_reports = {}  # root -> enable_acceleration() result
+
+    def get(self, path, scope=None, records=None):
+        """Snapshot for listing `path`; `scope` is the part of the worktree
+        git has to scan on a miss (default `path`, the whole repository
+        when `path` is the top level). `records` is a complete listing of
+        `path`, reused instead of stat-ing its files again."""
+        root = find_repo_root(path)
+        if root is None:
+            return None
+        scope = scope or path
+        state = repository_state(root)
+        checked = _checked_key(path)
+        with self._lock:
+            item = self._items.get(root)
+            if (item is not None and item[0] == state and item[2].covers(scope)
+                    and time.monotonic() - item[1] < self.ttl):
+                self._items.move_to_end(root)
+            else:
+                item = None
+        if item is not None and checked is not None and item[3] == checked:
+            with self._lock:
+                self.hits += 1
+            return item[2]
+        if item is not None:
+            snapshot = overlay_snapshot(item[2], path, records)
+            if snapshot is not None:
+                with self._lock:
+                    if self._items.get(root) is item:
+                        self._items[root] = (item[0], item[1], snapshot, checked)
+                    self.hits += 1
+                return snapshot
+        with self._lock:
+            self.misses += 1
+        if AUTO_ACCELERATE and root not in self._accelerated:
+            self._accelerated.add(root)
+            if acceleration_settings(root)['untrackedCache'] != 'true':
+                self.acceleration_reports[root] = enable_acceleration(root)
+        snapshot = take_snapshot(root, scope=scope)
+        if snapshot is not None and UNTRACKED_MODE == 'no':
+            snapshot = overlay_snapshot(snapshot, path, records, untracked_only=True)
+        if snapshot is not None:
+            # git status may refresh (rewrite) the index itself
+            state = repository_state(root)
+            with self._lock:
+                self._items[root] = (state, time.monotonic(), snapshot, checked)
+                self._items.move_to_end(root)
+                while len(self._items) > self.maxsize:
+                    self._items.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, path):
+        """Drop the snapshot of the repository containing `path`."""
+        root = find_repo_root(path)
+        with self._lock:
+            self._items.pop(root, None)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._items)}
+
+
+snapshot_cache = SnapshotCache()
+
+
+def cached_snapshot(path, scope=None, records=None):
+    return snapshot_cache.get(path, scope, records)
+
+
+def invalidate_snapshot(path):
+    snapshot_cache.invalidate(path)
@@ -0,0 +1,207 @@
+"""
+In-process .gitignore matching.
+
+The ignore rules of a repository (core.excludesFile, .git/info/exclude and
+every .gitignore from the top level down) are compiled to regular
+expressions once and cached per file; a file is recompiled only when its
+mtime changes. This tags ignored entries ('!!') in the listing without
+running git, and lets git status skip ignored trees.
+"""
+import os
+import re
+import threading
+
+from git_index import git_dir
+
+
+def _translate(pattern):
+    """Regular expression source for the glob part of an ignore pattern."""
+    i, n = 0, len(pattern)
+    out = []
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i) and (i == 0 or pattern[i - 1] == '/'):
+            out.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('**', i) and i + 2 == n and (i == 0 or pattern[i - 1] == '/'):
+            out.append('.*')
+            i += 2
+        elif c == '*':
+            out.append('[^/]*')
+            i += 1
+        elif c == '?':
+            out.append('[^/]')
+            i += 1
+        elif c == '[':
+            end = pattern.find(']', i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+                i += 1
+            else:
+                body = pattern[i + 1:end]
+                if body[0] in '!^':
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end + 1
+        elif c == '\\' and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return ''.join(out)
+
+
+def compile_pattern(line):
+    """Compile one line of an ignore file.
+
+    Returns (regex, negate, dir_only), or None for blank lines and comments.
+    """
+    if not line.endswith('\\ '):
+        line = line.rstrip(' ')
+    if not line or line.startswith('#'):
+        return None
+    negate = line.startswith('!')
+    if negate:
+        line = line[1:]
+    elif line.startswith('\\!') or line.startswith('\\#'):
+        line = line[1:]
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+    anchored = '/' in line
+    line = line.lstrip('/')
+    source = _translate(line)
+    if not anchored:
+        source = '(?:.*/)?' + source
+    return re.compile(source + r'\Z', re.DOTALL), negate, dir_only
+
+
+def parse_ignore_file(text):
+    rules = []
+    for line in text.splitlines():
+        rule = compile_pattern(line)
+        if rule is not None:
+            rules.append(rule)
+    return rules
+
+
+_compiled = {}  # file path -> (mtime_ns, rules)
+_compiled_lock = threading.Lock()
+
+
+def load_rules(path):
+    """Compiled rules of an ignore file, cached until its mtime changes."""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return []
+    with _compiled_lock:
+        cached = _compiled.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(path, encoding='utf-8', errors='surrogateescape') as f:
+            rules = parse_ignore_file(f.read())
+    except OSError:
+        rules = []
+    with _compiled_lock:
+        _compiled[path] = (mtime, rules)
+    return rules
+
+
+def _config_excludes_file(config_path):
+    # minimal reader for `[core] excludesFile = ...`
+    try:
+        with open(config_path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    section = None
+    value = None
+    for line in lines:
+        line = line.strip()
+        if line.startswith('['):
+            section = line.strip('[]').strip().lower()
+        elif section == 'core' and '=' in line:
+            key, _, val = line.partition('=')
+            if key.strip().lower() == 'excludesfile':
+                value = val.strip().strip('"')
+    return value
+
+
+def excludes_file(root):
+    """Path of core.excludesFile for the repository at `root`."""
+    xdg = os.environ.get('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser('~'), '.config')
+    value = None
+    for config in (os.path.join(xdg, 'git', 'config'), os.path.expanduser('~/.gitconfig'),
+                   os.path.join(git_dir(root), 'config')):
+        value = _config_excludes_file(config) or value
+    if value:
+        return os.path.expanduser(value)
+    return os.path.join(xdg, 'git', 'ignore')
+
+
+class IgnoreMatcher:
+    """Ignore rules of one repository.
+
+    `is_ignored` takes a path relative to the repository root ('/'
+    separated). The rule files and results for directories are memoized
+    per matcher, so checking all the entries of a directory costs one rule
+    evaluation per entry.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._global = excludes_file(root)
+        self._exclude = os.path.join(git_dir(root), 'info', 'exclude')
+        self._dirs = {}
+        self._sources = {}
+
+    def _rules_for(self, rel_dir):
+        """(base, rules) pairs that apply inside `rel_dir`, lowest
+        precedence first."""
+        sources = self._sources.get(rel_dir)
+        if sources is not None:
+            return sources
+        sources = [('', load_rules(self._global)), ('', load_rules(self._exclude))]
+        parts = rel_dir.split('/') if rel_dir else []
+        for depth in range(len(parts) + 1):
+            base = '/'.join(parts[:depth])
+            ignore_file = os.path.join(self.root, *parts[:depth], '.gitignore')
+            sources.append((base, load_rules(ignore_file)))
+        self._sources[rel_dir] = sources
+        return sources
+
+    def _match(self, rel, is_dir):
+        parent = rel.rpartition('/')[0]
+        result = False
+        for base, rules in self._rules_for(parent):
+            sub = rel[len(base) + 1:] if base else rel
+            for regex, negate, dir_only in rules:
+                if dir_only and not is_dir:
+                    continue
+                if regex.match(sub):
+                    result = not negate
+        return result
+
+    def is_ignored(self, rel, is_dir=False):
+        if not rel or rel == '.git' or rel.startswith('.git/'):
+            return False
+        parent = rel.rpartition('/')[0]
+        # a file cannot be re-included if one of its parents is excluded
+        if parent and self.is_ignored_dir(parent):
+            return True
+        if is_dir:
+            return self.is_ignored_dir(rel)
+        return self._match(rel, False)
+
+    def is_ignored_dir(self, rel):
+        cached = self._dirs.get(rel)
+        if cached is None:
+            parent = rel.rpartition('/')[0]
+            cached = bool(parent and self.is_ignored_dir(parent)) or self._match(rel, True)
+            self._dirs[rel] = cached
+        return cached
+
@@ -0,0 +1,73 @@
+"""
+File name -> icon lookup.
+
+The `icons` map has three kinds of keys: whole file names ('yarn.lock',
+'.babelrc', 'Earthfile'), multi-dot suffixes ('vue.config.js', 'd.ts')
+and plain extensions ('py'); the git status keys ('staged', 'modified',
+...) are icons of the status column, not of files. A name is resolved by
+trying the whole name ('LICENSE' finds 'license'), then the longest
+suffix that starts at a dot, then the extension. Suffixes are matched
+with a trie of the keys' dot-separated parts in reverse order
+('vue.config.js' -> js, config, vue), built once, so one walk from the
+end of the name finds the longest match. Names and suffixes compare
+case-insensitively.
+"""
+from icons import icons
+
+DEFAULT_ICON = 'default_file.svg'
+STATUS_KEYS = ('untracked', 'staged', 'modified', 'committed', 'question', 'ignored')
+
+
+def icon_file_name(filetype):
+    """File name of the svg icon of an icon type ('python' -> 'file_type_python.svg'),
+    built once per type."""
+    return _file_names.get(filetype, DEFAULT_ICON)
+
+
+class IconResolver:
+    """Precompiled icon lookup for file names.
+
+    Attributes:
+    -----------
+    names : file name -> icon type, for every key but the status keys, also
+            under its lowercase form ('Makefile' finds 'makefile')
+    trie : nested dicts of reversed name parts; the icon type of a suffix
+           is stored under the None key of its last node
+    """
+
+    def __init__(self, mapping):
+        mapping = {key: filetype for key, filetype in mapping.items() if key not in STATUS_KEYS}
+        self.names = dict(mapping)
+        self.names.update([(key.lower(), filetype) for key, filetype in mapping.items()
+                           if key.lower() not in mapping])
+        self.trie = {}
+        for key, filetype in mapping.items():
+            node = self.trie
+            for part in reversed(key.lower().split('.')):
+                node = node.setdefault(part, {})
+            node.setdefault(None, filetype)
+
+    def filetype(self, name):
+        """Icon type of file `name`, or None."""
+        filetype = self.names.get(name)
+        if filetype is None:
+            filetype = self.names.get(name.lower())
+        if filetype is not None:
+            return filetype
+        # the first part is the stem, never a suffix on its own
+        parts = name.lower().split('.')
+        node, found = self.trie, None
+        for part in reversed(parts[1:]):
+            node = node.get(part)
+            if node is None:
+                break
+            found = node.get(None, found)
+        return found
+
+    def icon(self, name):
+        """File name of the svg icon for file `name`."""
+        return icon_file_name(self.filetype(name))
+
+
+_file_names = {filetype: f'file_type_{filetype}.svg' for filetype in set(icons.values())}
+icon_resolver = IconResolver(icons)
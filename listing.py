@@ -0,0 +1,567 @@
+"""
+Directory listing engine.
+
+A directory is read with a single ``os.scandir`` pass: the entry type comes
+from the directory entry itself (d_type) and every entry is stat'ed at most
+once. On remote filesystems (NFS, SMB, FUSE), where every stat is a
+network round trip, the stats are issued from a thread pool. Listings of
+unchanged directories are served from a bounded LRU cache.
+"""
+import heapq
+import os
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+
+
+class FileRecord(NamedTuple):
+    name: str
+    is_dir: bool
+    size: int
+    mtime_ns: int
+    ctime_ns: int
+    symlink_target: Optional[str] = None
+    executable: bool = False
+
+
+# parallel stat on remote filesystems: number of threads
+STAT_WORKERS = 16
+# mount point -> True / False to force the parallel mode on or off for a
+# mount; mounts not listed are detected from their filesystem type
+MOUNT_SETTINGS = {}
+REMOTE_FS_TYPES = {'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'ncpfs', 'afs', '9p',
+                   'ceph', 'glusterfs', 'lustre', 'gpfs', 'fuse', 'fuseblk'}
+MOUNTS_MAX_AGE = 30.0
+
+
+def _unescape(field):
+    # /proc/mounts encodes space, tab, newline and backslash as octal
+    return field.replace('\\040', ' ').replace('\\011', '\t').replace('\\012', '\n').replace('\\134', '\\')
+
+
+def read_mounts(path='/proc/mounts'):
+    """List of (mount point, filesystem type), longest mount point first.
+    Empty where /proc/mounts does not exist."""
+    mounts = []
+    try:
+        with open(path) as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 3:
+                    mounts.append((_unescape(fields[1]), fields[2]))
+    except OSError:
+        return []
+    mounts.sort(key=lambda mount: len(mount[0]), reverse=True)
+    return mounts
+
+
+_mounts = (None, [])  # (read at, read_mounts())
+_mounts_lock = threading.Lock()
+
+
+def mount_of(path):
+    """(mount point, filesystem type) of the mount holding `path`."""
+    global _mounts
+    with _mounts_lock:
+        if _mounts[0] is None or time.monotonic() - _mounts[0] > MOUNTS_MAX_AGE:
+            _mounts = (time.monotonic(), read_mounts())
+        mounts = _mounts[1]
+    path = os.path.abspath(path)
+    for point, fstype in mounts:
+        if path == point or path.startswith(point.rstrip('/') + '/'):
+            return point, fstype
+    return '/', ''
+
+
+def is_remote_fs(fstype):
+    return fstype in REMOTE_FS_TYPES or fstype.startswith('fuse.')
+
+
+def parallel_stat(path):
+    """True if entries of `path` should be stat'ed from the thread pool."""
+    point, fstype = mount_of(path)
+    setting = MOUNT_SETTINGS.get(point)
+    if setting is not None:
+        return setting
+    return is_remote_fs(fstype)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def stat_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=STAT_WORKERS, thread_name_prefix='stat')
+        return _pool
+
+
+def _record(entry):
+    target = None
+    if entry.is_symlink():
+        try:
+            target = os.readlink(entry.path)
+        except OSError:
+            pass
+    try:
+        st = entry.stat()
+    except OSError:
+        # broken symlink: describe the link itself
+        st = entry.stat(follow_symlinks=False)
+    try:
+        is_dir = entry.is_dir()
+    except OSError:
+        is_dir = False
+    return FileRecord(entry.name, is_dir, st.st_size, st.st_mtime_ns, st.st_ctime_ns, target,
+                      bool(st.st_mode & 0o100))
+
+
+def name_key(name):
+    return name.lower(), name
+
+
+def sort_key(record):
+    return name_key(record.name)
+
+
+def _try_record(entry):
+    try:
+        return _record(entry)
+    except OSError:
+        return None
+
+
+IS_DIR = 1
+IS_SYMLINK = 2
+IS_EXEC = 4
+
+
+class Listing:
+    """Read-only listing stored as one array per column.
+
+    A FileRecord per entry costs a tuple and three int objects; here an
+    entry is its name, three int64 slots and a flag byte, so large
+    directories can stay in the cache. Indexing and iteration give
+    FileRecords, built on demand: only the rows of the page being drawn
+    exist as objects.
+
+    Attributes:
+    -----------
+    names : entry names (the strings read by the scan; interning them would
+            add an interned-dict slot per unique name)
+    sizes, mtimes, ctimes : array('q') of st_size, st_mtime_ns, st_ctime_ns
+    flags : array('B') of IS_DIR | IS_SYMLINK | IS_EXEC
+    targets : position -> symlink target, for symlinks only
+    """
+    __slots__ = ('names', 'sizes', 'mtimes', 'ctimes', 'flags', 'targets')
+
+    def __init__(self, records=()):
+        self.names = []
+        self.sizes = array('q')
+        self.mtimes = array('q')
+        self.ctimes = array('q')
+        self.flags = array('B')
+        self.targets = {}
+        for record in records:
+            if record.symlink_target is not None:
+                self.targets[len(self.names)] = record.symlink_target
+            self.names.append(record.name)
+            self.sizes.append(record.size)
+            self.mtimes.append(record.mtime_ns)
+            self.ctimes.append(record.ctime_ns)
+            self.flags.append((IS_DIR if record.is_dir else 0)
+                              | (IS_SYMLINK if record.symlink_target is not None else 0)
+                              | (IS_EXEC if record.executable else 0))
+
+    def __len__(self):
+        return len(self.names)
+
+    def record(self, i):
+        flags = self.flags[i]
+        return FileRecord(self.names[i], bool(flags & IS_DIR), self.sizes[i], self.mtimes[i],
+                          self.ctimes[i], self.targets.get(i), bool(flags & IS_EXEC))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.record(i) for i in range(*index.indices(len(self.names)))]
+        if index < 0:
+            index += len(self.names)
+        if not 0 <= index < len(self.names):
+            raise IndexError('listing index out of range')
+        return self.record(index)
+
+    def __iter__(self):
+        return map(self.record, range(len(self.names)))
+
+    def nbytes(self):
+        """Approximate memory held by the listing."""
+        size = sys.getsizeof(self.names) + sys.getsizeof(self.targets)
+        size += sum(sys.getsizeof(column) for column in (self.sizes, self.mtimes, self.ctimes, self.flags))
+        size += sum(map(sys.getsizeof, self.names))
+        return size + sum(map(sys.getsizeof, self.targets.values()))
+
+
+# memory limit of the listing cache, in bytes
+LISTING_CACHE_BYTES = 64 * 1024 * 1024
+# directories modified less than this many seconds before the scan are not
+# cached: a change in the same mtime tick would not be noticed
+RACY_WINDOW = 1.0
+
+
+def directory_key(path):
+    """(st_mtime_ns, st_ino) of a directory, the validity key of its listing."""
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_ino
+
+
+_RECORD_BYTES = sys.getsizeof(FileRecord('', False, 0, 0, 0)) + 5 * sys.getsizeof(2 ** 62)
+
+
+def listing_size(records):
+    """Approximate memory held by a Listing or a list of FileRecords."""
+    if isinstance(records, Listing):
+        return records.nbytes()
+    size = sys.getsizeof(records) + len(records) * _RECORD_BYTES
+    for record in records:
+        size += sys.getsizeof(record.name)
+        if record.symlink_target is not None:
+            size += sys.getsizeof(record.symlink_target)
+    return size
+
+
+class DirectoryCache:
+    """LRU cache of directory listings.
+
+    A listing is keyed on the directory path and validated against the
+    directory's (st_mtime_ns, st_ino): adding, removing or renaming an entry
+    changes the directory mtime, and replacing the directory changes its
+    inode. Rewriting a file in place does not, so its size and times are
+    refreshed when the directory itself changes or invalidate() is called.
+
+    Attributes:
+    -----------
+    max_bytes : memory limit (LISTING_CACHE_BYTES, read at use, unless
+                given); least recently used listings are evicted
+    hits, misses, evictions : counters
+    """
+
+    def __init__(self, max_bytes=None):
+        self._max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._items = OrderedDict()  # path -> ((mtime_ns, ino), size, records)
+        self._lock = threading.Lock()
+
+    @property
+    def max_bytes(self):
+        return LISTING_CACHE_BYTES if self._max_bytes is None else self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value):
+        self._max_bytes = value
+
+    def lookup(self, path, key):
+        """Cached listing of `path` if it is still valid for `key`, else None."""
+        with self._lock:
+            item = self._items.get(path)
+            if item is not None and item[0] == key:
+                self._items.move_to_end(path)
+                self.hits += 1
+                return item[2]
+            self.misses += 1
+        return None
+
+    def store(self, path, key, records, started):
+        """Cache `records`, read by a scan that started at `started`
+        (time.time_ns()), unless the directory changed just before it."""
+        if started - key[0] > RACY_WINDOW * 1e9:
+            self._store(path, key, records)
+        else:
+            self.invalidate(path)
+
+    def _store(self, path, key, records):
+        size = listing_size(records)
+        max_bytes = self.max_bytes
+        with self._lock:
+            old = self._items.pop(path, None)
+            if old is not None:
+                self.bytes -= old[1]
+            if size > max_bytes:
+                return
+            self._items[path] = (key, size, records)
+            self.bytes += size
+            while self.bytes > max_bytes:
+                _, (_, evicted, _) = self._items.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def invalidate(self, path):
+        """Drop the listing of `path`."""
+        with self._lock:
+            item = self._items.pop(os.path.abspath(path), None)
+            if item is not None:
+                self.bytes -= item[1]
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'size': len(self._items), 'bytes': self.bytes}
+
+
+directory_cache = DirectoryCache()
+
+
+# progressive listing: rows shown before the scan of a large directory
+# finishes, and the per-directory scan budget
+FIRST_PAGE = 200
+FIRST_PAGE_WAIT = 0.3
+SCAN_BUDGET_ENTRIES = 100000
+SCAN_BUDGET_SECONDS = 10.0
+# scans kept for directories that were not cached (budget exceeded, racy)
+MAX_SCANS = 8
+_SCAN_BATCH = 256
+
+
+class DirectoryScan:
+    """Scan of one directory on a background thread.
+
+    Records are appended in the order os.scandir returns them, so the rows
+    read so far can be shown while the scan continues; `records[:n]` never
+    changes once read. The scan stops when it reaches `max_entries` or
+    `max_seconds` (a partial listing). The sorted listing is available once
+    it is done, and a complete listing also goes to the directory cache.
+
+    Attributes:
+    -----------
+    path, key : the directory and its directory_key() when the scan started
+    records : FileRecords in scan order, growing while the scan runs; the
+              sorted Listing once it is done
+    done : True once the scan finished, completely or at the budget
+    partial : True if the budget was exceeded
+    elapsed : seconds spent scanning
+    error : OSError raised by os.scandir, if any
+    """
+
+    def __init__(self, path, key, max_entries=None, max_seconds=None):
+        self.path = path
+        self.key = key
+        self.max_entries = SCAN_BUDGET_ENTRIES if max_entries is None else max_entries
+        self.max_seconds = SCAN_BUDGET_SECONDS if max_seconds is None else max_seconds
+        self.records = []
+        self.done = False
+        self.partial = False
+        self.elapsed = 0.0
+        self.error = None
+        self._sorted = None
+        self._finished = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self.run, name=f'scan {self.path}', daemon=True).start()
+        return self
+
+    def _add(self, entries, parallel):
+        records = stat_pool().map(_try_record, entries) if parallel else map(_try_record, entries)
+        self.records.extend(record for record in records if record is not None)
+
+    def run(self):
+        started = time.monotonic()
+        started_ns = time.time_ns()
+        parallel = parallel_stat(self.path)
+        batch = []
+        try:
+            with os.scandir(self.path) as it:
+                for count, entry in enumerate(it):
+                    if count >= self.max_entries or time.monotonic() - started > self.max_seconds:
+                        self.partial = True
+                        break
+                    batch.append(entry)
+                    if not parallel or len(batch) >= _SCAN_BATCH:
+                        self._add(batch, parallel)
+                        batch = []
+            self._add(batch, parallel)
+        except OSError as e:
+            self.error = e
+        self._sorted = Listing(sorted(self.records, key=sort_key))
+        # the compact listing replaces the records once the scan is done
+        self.records = self._sorted
+        self.elapsed = time.monotonic() - started
+        if not self.partial and self.error is None:
+            directory_cache.store(self.path, self.key, self._sorted, started_ns)
+        self.done = True
+        self._finished.set()
+
+    def wait(self, count, timeout):
+        """Wait until `count` records were read, the scan is done or
+        `timeout` seconds passed."""
+        deadline = time.monotonic() + timeout
+        while len(self.records) < count and time.monotonic() < deadline:
+            if self._finished.wait(0.005):
+                break
+        return self.done
+
+    def listing(self):
+        """(records, done): the sorted listing once done, else the records
+        read so far in scan order. `done` is read once, so it always
+        describes the records returned with it."""
+        done = self.done
+        return (self._sorted if done else self.records[:]), done
+
+
+_scans = OrderedDict()  # path -> DirectoryScan
+_scans_lock = threading.Lock()
+
+
+def current_scan(path, key=None):
+    """The DirectoryScan of `path` for its current contents, or None."""
+    path = os.path.abspath(path)
+    with _scans_lock:
+        scan = _scans.get(path)
+    if scan is None:
+        return None
+    try:
+        key = key or directory_key(path)
+    except OSError:
+        return None
+    return scan if scan.key == key and scan.error is None else None
+
+
+def start_scan(path):
+    """Current scan of `path`, starting one if there is none."""
+    path = os.path.abspath(path)
+    key = directory_key(path)
+    scan = current_scan(path, key)
+    if scan is not None:
+        return scan
+    scan = DirectoryScan(path, key)
+    with _scans_lock:
+        _scans[path] = scan
+        _scans.move_to_end(path)
+        for old in [p for p, s in _scans.items() if s.done][:max(0, len(_scans) - MAX_SCANS)]:
+            del _scans[old]
+    return scan.start()
+
+
+def progressive_listing(path, first_page=None, wait=None):
+    """Listing of `path` without waiting for the whole of a large directory.
+
+    Returns (records, scan, done). `scan` is None for a cached listing;
+    otherwise the records are the sorted listing if the scan finished
+    within `wait` seconds (default FIRST_PAGE_WAIT), or the first
+    `first_page` (default FIRST_PAGE) or more entries read so far, while
+    `scan` keeps running. `done` tells which of the two the records are
+    (the scan may finish right after they were taken).
+    """
+    path = os.path.abspath(path)
+    key = directory_key(path)
+    scan = current_scan(path, key)
+    if scan is None:
+        records = directory_cache.lookup(path, key)
+        if records is not None:
+            return records, None, True
+        scan = start_scan(path)
+    scan.wait(FIRST_PAGE if first_page is None else first_page,
+              FIRST_PAGE_WAIT if wait is None else wait)
+    records, done = scan.listing()
+    return records, scan, done
+
+
+PAGE_SIZE = 1000
+
+
+class Page(NamedTuple):
+    """One page of a listing.
+
+    Attributes:
+    -----------
+    records : the rows of the page, sorted
+    start : position of the first row in the sorted listing
+    total : number of entries in the listing
+    prev_cursor, next_cursor : cursors of the neighbouring pages, or None
+    """
+    records: list
+    start: int
+    total: int
+    prev_cursor: Optional[str]
+    next_cursor: Optional[str]
+
+
+def _lower_bound(records, key):
+    # bisect_left(records, key, key=sort_key) without the Python 3.10 key
+    # argument (and without a list of all the keys)
+    lo, hi = 0, len(records)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if sort_key(records[mid]) < key:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def listing_page(records, cursor=None, size=None, is_sorted=True):
+    """The page of `size` (default PAGE_SIZE) records starting at `cursor`.
+
+    A cursor is an entry name (or a prefix such as a letter); the page
+    starts at the first entry that does not sort before it, so it stays in
+    place when entries are added or removed elsewhere. A cursor past the
+    end gives the last page. `records` that are not sorted (a scan in
+    progress) are paged in sort order without sorting them all.
+    """
+    size = PAGE_SIZE if size is None else size
+    key = name_key(cursor or '')
+    total = len(records)
+    if is_sorted:
+        start = _lower_bound(records, key)
+        if start >= total and total:
+            start = max(0, total - size)
+        rows = records[start:start + size]
+        prev_cursor = records[max(0, start - size)].name if start else None
+        next_cursor = records[start + size].name if start + size < total else None
+        return Page(rows, start, total, prev_cursor, next_cursor)
+    before = [record for record in records if sort_key(record) < key]
+    after = heapq.nsmallest(size + 1, (record for record in records if sort_key(record) >= key), key=sort_key)
+    if not after and before:
+        return listing_page(sorted(records, key=sort_key), cursor, size)
+    earlier = heapq.nlargest(size, before, key=sort_key)
+    return Page(after[:size], len(before), total, earlier[-1].name if earlier else None,
+                after[size].name if len(after) > size else None)
+
+
+def invalidate_listing(path):
+    path = os.path.abspath(path)
+    directory_cache.invalidate(path)
+    with _scans_lock:
+        _scans.pop(path, None)
+
+
+if __name__ == '__main__':
+    # memory of a cached listing: python listing.py [entries]
+    import tracemalloc
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    now = time.time_ns()
+
+    def synthetic():
+        for i in range(count):
+            yield FileRecord(f'file_{i:07d}.{("py", "txt", "json", "md")[i % 4]}', i % 50 == 0, i * 37,
+                             now - i * 1000003, now - i * 999983)
+
+    for label, build in (('FileRecord list', lambda: list(synthetic())), ('Listing', lambda: Listing(synthetic()))):
+        tracemalloc.start()
+        started = time.perf_counter()
+        records = build()
+        elapsed = time.perf_counter() - started
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        page = listing_page(records, 'file_05', PAGE_SIZE)
+        print(f'{label:16} {count:,} entries: {current / 2 ** 20:7.1f} MiB ({current / count:5.1f} B/entry), '
+              f'built in {elapsed:.2f}s, listing_size() {listing_size(records) / 2 ** 20:.1f} MiB, '
+              f'page at {page.start:,}')
+        del records, page
@@ -0,0 +1,157 @@
+"""
+Discovery of git repositories around the directories being browsed.
+
+The index remembers, for every directory it has seen, whether it holds a
+'.git' directory (a repository) or a '.git' file (a linked worktree or a
+submodule). Looking up the repository of a path is then a walk over
+dictionary entries. Entries are re-validated against the directory mtime
+(creating or removing '.git' changes it) once they are older than
+`max_age` seconds, and can be dropped explicitly after `git init` or
+`git clone`.
+"""
+import os
+import threading
+import time
+
+
+class RepoInfo:
+    """A repository root.
+
+    Attributes:
+    -----------
+    root : worktree top-level directory
+    kind : 'repo', 'worktree' or 'submodule'
+    git_dir : the repository's git directory
+    """
+    __slots__ = ('root', 'kind', 'git_dir')
+
+    def __init__(self, root, kind, git_dir):
+        self.root = root
+        self.kind = kind
+        self.git_dir = git_dir
+
+    def __repr__(self):
+        return f'RepoInfo({self.root!r}, {self.kind!r})'
+
+
+def read_marker(path):
+    """RepoInfo if `path` itself is a worktree root, else None."""
+    dot_git = os.path.join(path, '.git')
+    if os.path.isdir(dot_git):
+        return RepoInfo(path, 'repo', dot_git)
+    if os.path.isfile(dot_git):
+        try:
+            with open(dot_git) as f:
+                line = f.readline().strip()
+        except OSError:
+            return None
+        if not line.startswith('gitdir:'):
+            return None
+        gdir = os.path.normpath(os.path.join(path, line[len('gitdir:'):].strip()))
+        parts = gdir.replace(os.sep, '/').split('/')
+        kind = 'submodule' if 'modules' in parts else 'worktree' if 'worktrees' in parts else 'repo'
+        return RepoInfo(path, kind, gdir)
+    return None
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class RepoIndex:
+    """Cache of repository roots for browsed directories."""
+
+    def __init__(self, scan_depth=2, max_age=5.0):
+        self.scan_depth = scan_depth
+        self.max_age = max_age
+        self._dirs = {}  # directory -> (mtime_ns, checked_at, RepoInfo or None)
+        self._lock = threading.Lock()
+
+    def _record(self, path, mtime=None):
+        if mtime is None:
+            mtime = _mtime(path)
+        item = (mtime, time.monotonic(), read_marker(path) if mtime is not None else None)
+        with self._lock:
+            self._dirs[path] = item
+        return item
+
+    def marker(self, path):
+        """RepoInfo if `path` is a worktree root, else None."""
+        path = os.path.abspath(path)
+        item = self._dirs.get(path)
+        if item is None:
+            item = self._record(path)
+        elif time.monotonic() - item[1] > self.max_age:
+            mtime = _mtime(path)
+            if mtime != item[0]:
+                item = self._record(path, mtime)
+            else:
+                with self._lock:
+                    self._dirs[path] = item = (item[0], time.monotonic(), item[2])
+        return item[2]
+
+    def repo_for(self, path):
+        """RepoInfo of the innermost repository containing `path`, or None.
+
+        Nested repositories and submodules win over their parents.
+        """
+        path = os.path.abspath(path)
+        while True:
+            info = self.marker(path)
+            if info is not None:
+                return info
+            parent = os.path.dirname(path)
+            if parent == path:
+                return None
+            path = parent
+
+    def scan(self, top, depth=None):
+        """Record `top`, its parents, and its subdirectories down to `depth`
+        levels (default scan_depth), so later lookups are dictionary hits.
+        Returns the repositories found below `top`."""
+        top = os.path.abspath(top)
+        depth = self.scan_depth if depth is None else depth
+        self.repo_for(top)
+        found = []
+        level = [top]
+        for _ in range(depth):
+            next_level = []
+            for directory in level:
+                try:
+                    entries = list(os.scandir(directory))
+                except OSError:
+                    continue
+                for entry in entries:
+                    if entry.name == '.git' or not entry.is_dir(follow_symlinks=False):
+                        continue
+                    try:
+                        mtime = entry.stat(follow_symlinks=False).st_mtime_ns
+                    except OSError:
+                        continue
+                    info = self._record(entry.path, mtime)[2]
+                    if info is not None:
+                        found.append(info)
+                    next_level.append(entry.path)
+            level = next_level
+        return found
+
+    def invalidate(self, path):
+        """Forget `path` and everything below it."""
+        path = os.path.abspath(path)
+        prefix = path.rstrip(os.sep) + os.sep
+        with self._lock:
+            for key in [k for k in self._dirs if k == path or k.startswith(prefix)]:
+                del self._dirs[key]
+
+
+repo_index = RepoIndex()
+
+
+def find_repo_root(path):
+    """Return the top-level directory of the repository containing `path`,
+    or None. A '.git' directory or file (worktrees, submodules) marks a root."""
+    info = repo_index.repo_for(path)
+    return info.root if info is not None else None
@@ -0,0 +1,127 @@
+"""
+Version numbers of the directories shown in the browser.
+
+Callbacks that change a repository (git add, commit, checkout, merge,
+clone, ...) bump its version instead of incrementing a counter of their
+own, and the listing callback listens to that one version. A render waits
+until no bump happened for `window` seconds, so a burst of changes gives a
+single render of the last version, and a trigger whose version the browser
+already shows is dropped. Both count as saved renders.
+
+A version is the time of its bump in nanoseconds (strictly increasing per
+repository), so versions bumped by different worker processes compare in
+order. The listing callback takes the version from the browser's
+repo_version store, which may come from another worker than the one
+rendering.
+"""
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+from repo_index import find_repo_root
+
+# quiet period after the last bump before a render, and the longest wait
+COALESCE_WINDOW = 0.05
+COALESCE_MAX_WAIT = 0.5
+
+
+class RepoState:
+    """Per-repository version numbers.
+
+    Attributes:
+    -----------
+    window, max_wait : coalescing window and longest wait in seconds
+                       (COALESCE_WINDOW / COALESCE_MAX_WAIT, read at use,
+                       unless given)
+    bumps : number of bump() calls
+    renders : renders done for a version change
+    saved : renders avoided by coalescing or dropping stale triggers
+    """
+
+    def __init__(self, window=None, max_wait=None):
+        self._window = window
+        self._max_wait = max_wait
+        self.bumps = 0
+        self.renders = 0
+        self.saved = 0
+        self._versions = {}  # repository root (or directory) -> (version, bumped at)
+        self._recent = defaultdict(lambda: deque(maxlen=64))  # key -> versions bumped here
+        self._lock = threading.Lock()
+
+    @property
+    def window(self):
+        return COALESCE_WINDOW if self._window is None else self._window
+
+    @window.setter
+    def window(self, value):
+        self._window = value
+
+    @property
+    def max_wait(self):
+        return COALESCE_MAX_WAIT if self._max_wait is None else self._max_wait
+
+    @max_wait.setter
+    def max_wait(self, value):
+        self._max_wait = value
+
+    @staticmethod
+    def key(path):
+        return find_repo_root(path) or os.path.abspath(path)
+
+    def bump(self, path):
+        """Record a change below `path`. Returns the value for the
+        repo_version store."""
+        key = self.key(path)
+        with self._lock:
+            version = max(self._versions.get(key, (0, 0.0))[0] + 1, time.time_ns())
+            self._versions[key] = (version, time.monotonic())
+            self._recent[key].append(version)
+            self.bumps += 1
+        return {'path': key, 'version': version}
+
+    def version(self, path, stored=None):
+        """Latest version of `path`: the last bump in this process, or the
+        repo_version store value `stored` if it is newer."""
+        key = self.key(path)
+        with self._lock:
+            version = self._versions.get(key, (0, 0.0))[0]
+        if stored and stored.get('path') == key:
+            version = max(version, stored['version'])
+        return version
+
+    def settle(self, path, stored=None):
+        """Wait until `path` has not been bumped for `window` seconds (at
+        most `max_wait`), and return its version (see version())."""
+        key = self.key(path)
+        window = self.window
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            with self._lock:
+                bumped_at = self._versions.get(key, (0, 0.0))[1]
+            now = time.monotonic()
+            wait = min(bumped_at + window, deadline) - now
+            if wait <= 0:
+                return self.version(path, stored)
+            time.sleep(wait)
+
+    def rendered(self, path, shown, version):
+        """Count a render of `version` for a browser that showed version
+        `shown`; the versions bumped here in between did not get a render
+        of their own."""
+        key = self.key(path)
+        with self._lock:
+            self.renders += 1
+            if shown is not None:
+                self.saved += sum(1 for bumped in self._recent[key] if shown < bumped < version)
+
+    def skipped(self):
+        """Count a trigger dropped because its version was already shown."""
+        with self._lock:
+            self.saved += 1
+
+    def stats(self):
+        return {'bumps': self.bumps, 'renders': self.renders, 'saved': self.saved}
+
+
+repo_state = RepoState()
@@ -0,0 +1,129 @@
+"""
+SVG sprite of the file type icons.
+
+The icons referenced by the `icons` map (plus the default file and folder
+icons) are packed into one SVG file of <symbol> elements, drawn in the
+browser with <use href="sprite#symbol-id">. Ids, classes and <style> rules
+inside each icon are prefixed so icons cannot affect each other once they
+share a document. The file name carries a hash of the content, so it can
+be cached forever: a changed icon set gets a new URL.
+
+Build it with `python sprite.py`; the app builds it on start if there is
+no sprite newer than the icons, and keeps it in memory if the build
+directory cannot be written.
+"""
+import hashlib
+import os
+import re
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from icons import icons
+
+ICONS_DIR = Path(__file__).with_name('assets') / 'icons'
+SPRITE_DIR = Path(__file__).with_name('build') / 'sprite'
+# Cache-Control max-age of the sprite (the URL changes with its content)
+SPRITE_MAX_AGE = 365 * 24 * 3600
+DEFAULT_ICONS = ('default_file.svg', 'default_folder.svg')
+
+_SVG = re.compile(r'<svg\b([^>]*)>(.*)</svg>', re.S)
+_VIEW_BOX = re.compile(r'\bviewBox="([^"]*)"')
+_DROP = re.compile(r'<\?xml.*?\?>|<!DOCTYPE[^>]*>|<!--.*?-->|<title>.*?</title>', re.S)
+_ID = re.compile(r'\bid="([^"]+)"')
+_REF = re.compile(r'(url\(#|href="#)([^)"]+)')
+_CLASS = re.compile(r'\bclass="([^"]+)"')
+_STYLE = re.compile(r'(<style[^>]*>)(.*?)(</style>)', re.S)
+_SELECTOR = re.compile(r'\.([A-Za-z_][\w-]*)(?=[^{}]*\{)')
+
+
+def sprite_icons():
+    """File names of the icons in the sprite."""
+    names = {f'file_type_{icon}.svg' for icon in icons.values()}
+    names.update(DEFAULT_ICONS)
+    return sorted(name for name in names if (ICONS_DIR / name).is_file())
+
+
+def symbol_id(file_name):
+    """Id of the <symbol> of an icon file ('file_type_python.svg' -> 'file_type_python')."""
+    return file_name[:-4] if file_name.endswith('.svg') else file_name
+
+
+def symbol(file_name, svg, prefix):
+    """One icon as a <symbol>; its own ids and classes get `prefix`."""
+    match = _SVG.search(_DROP.sub('', svg))
+    if match is None:
+        raise ValueError(f'{file_name}: no <svg> element')
+    attributes, body = match.groups()
+    view_box = _VIEW_BOX.search(attributes)
+    body = _ID.sub(lambda m: f'id="{prefix}{m.group(1)}"', body)
+    body = _REF.sub(lambda m: f'{m.group(1)}{prefix}{m.group(2)}', body)
+    body = _CLASS.sub(lambda m: 'class="%s"' % ' '.join(prefix + name for name in m.group(1).split()), body)
+    body = _STYLE.sub(lambda m: m.group(1) + _SELECTOR.sub(lambda s: f'.{prefix}{s.group(1)}', m.group(2))
+                      + m.group(3), body)
+    view_box = f' viewBox="{view_box.group(1)}"' if view_box else ''
+    return f'<symbol id="{symbol_id(file_name)}"{view_box}>{body.strip()}</symbol>'
+
+
+def render_sprite(names=None):
+    names = sprite_icons() if names is None else names
+    symbols = [symbol(name, (ICONS_DIR / name).read_text(encoding='utf-8'), f'i{i}-')
+               for i, name in enumerate(names)]
+    return ('<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">'
+            + ''.join(symbols) + '</svg>\n')
+
+
+def sprite_name(data):
+    return f'icons.{hashlib.sha256(data).hexdigest()[:12]}.svg'
+
+
+def build_sprite(out_dir=SPRITE_DIR, data=None):
+    """Write icons.<hash>.svg to `out_dir`, remove older sprites, and return its path."""
+    data = render_sprite().encode('utf-8') if data is None else data
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / sprite_name(data)
+    if not path.exists():
+        tmp = path.with_suffix('.tmp')
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    for old in out_dir.glob('icons.*.svg'):
+        if old != path:
+            old.unlink()
+    return path
+
+
+class Sprite(NamedTuple):
+    """The sprite served by the app.
+
+    Attributes:
+    -----------
+    name : file name, icons.<hash>.svg
+    data : the SVG document
+    path : the built file, or None if it could not be written
+    """
+    name: str
+    data: bytes
+    path: Optional[Path]
+
+
+def load_sprite(out_dir=SPRITE_DIR):
+    """The built sprite, rebuilt if the icons changed since it was written.
+    If `out_dir` cannot be written (a read-only install) the sprite is
+    only kept in memory."""
+    try:
+        built = sorted(out_dir.glob('icons.*.svg'), key=lambda p: p.stat().st_mtime)
+        sources = max(Path(__file__).with_name('icons.py').stat().st_mtime, ICONS_DIR.stat().st_mtime)
+        if built and built[-1].stat().st_mtime >= sources:
+            return Sprite(built[-1].name, built[-1].read_bytes(), built[-1])
+    except OSError:
+        pass
+    data = render_sprite().encode('utf-8')
+    try:
+        path = build_sprite(out_dir, data)
+    except OSError:
+        return Sprite(sprite_name(data), data, None)
+    return Sprite(path.name, data, path)
+
+
+if __name__ == '__main__':
+    path = build_sprite()
+    print(f'{path} ({len(sprite_icons())} icons, {path.stat().st_size:,} bytes)')
@@ -0,0 +1,99 @@
+"""
+Simultaneous navigations in different repositories must not interfere:
+every git command runs with its own working directory, so the status,
+branch and listing of each repository computed from many threads at once
+are the same as when computed one after the other.
+"""
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import app  # noqa: E402
+import listing  # noqa: E402
+from git_status import cached_snapshot, invalidate_snapshot  # noqa: E402
+from listing import invalidate_listing, progressive_listing  # noqa: E402
+from repo_state import repo_state  # noqa: E402
+
+REPOS = 6
+ROUNDS = 5
+
+
+def git(cwd, *args):
+    subprocess.run(['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com', *args],
+                   cwd=cwd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+@pytest.fixture(scope='module')
+def repos(tmp_path_factory):
+    """Repositories with different branches, files and statuses."""
+    paths = []
+    for i in range(REPOS):
+        path = tmp_path_factory.mktemp(f'repo{i}')
+        git(path, 'init', '-q', '-b', f'branch{i}')
+        for j in range(10 + i):
+            (path / f'file{j}.txt').write_text(f'{i} {j}\n')
+        (path / 'sub').mkdir()
+        (path / 'sub' / 'inner.py').write_text('x = 1\n')
+        git(path, 'add', '-A')
+        git(path, 'commit', '-q', '-m', 'init')
+        # repository i: i modified files, one staged file, i untracked files
+        for j in range(i):
+            (path / f'file{j}.txt').write_text('changed\n')
+            (path / f'new{j}.md').write_text('new\n')
+        (path / 'staged.txt').write_text('staged\n')
+        git(path, 'add', 'staged.txt')
+        paths.append(str(path))
+    return paths
+
+
+def navigate(path):
+    """What the browser gets when it opens `path`: branch, status and listing."""
+    snapshot = cached_snapshot(path)
+    records, scan, done = progressive_listing(path)
+    if scan is not None:
+        scan.wait(len(os.listdir(path)), 10)
+        records, scan, done = progressive_listing(path)
+    view = app.listing_view(path, records, scan, done, None, listing.PAGE_SIZE, snapshot, repo_state.version(path))
+    data = view['data']
+    return (app.get_current_branch(path),
+            sorted((e.path, e.code) for e in snapshot.entries),
+            data['path'],
+            data['names'],
+            [data['code_table'][code] for code in data['codes']],
+            [data['status_table'][status] for status in data['status']])
+
+
+def forget(paths):
+    for path in paths:
+        invalidate_snapshot(path)
+        invalidate_listing(path)
+
+
+def test_parallel_navigation_matches_serial(repos):
+    cwd = os.getcwd()
+    forget(repos)
+    expected = {path: navigate(path) for path in repos}
+    # the repositories really differ
+    assert len({result[0] for result in expected.values()}) == REPOS
+    assert len({len(result[1]) for result in expected.values()}) == REPOS
+
+    barrier = threading.Barrier(len(repos) * 2)
+
+    def run(path):
+        barrier.wait()
+        return path, navigate(path)
+
+    with ThreadPoolExecutor(max_workers=len(repos) * 2) as pool:
+        for _ in range(ROUNDS):
+            forget(repos)
+            # two browsers per repository, all starting at the same moment
+            for path, result in pool.map(run, repos * 2):
+                assert result == expected[path], path
+    assert os.getcwd() == cwd
@@ -0,0 +1,141 @@
+"""
+The in-process readers of git data (index parser, gitignore matcher) give
+the same answers as git itself, and status snapshots show the files of the
+listed directory correctly on the first navigation.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import git_status  # noqa: E402
+from git_index import git_dir, read_index  # noqa: E402
+from git_status import cached_snapshot, invalidate_snapshot  # noqa: E402
+from gitignore import IgnoreMatcher  # noqa: E402
+
+
+def git(cwd, *args):
+    return subprocess.run(['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com', *args],
+                          cwd=cwd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          encoding='utf-8', errors='surrogateescape').stdout
+
+
+def write(root, rel, text=''):
+    path = Path(root, rel)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def git_index_entries(root):
+    """path -> (mode, mtime_ns, ino, size) as reported by git ls-files."""
+    modes = {}
+    for line in git(root, 'ls-files', '-s', '-z').split('\0'):
+        if line:
+            info, _, path = line.partition('\t')
+            modes[path] = int(info.split()[0], 8)
+    entries = {}
+    path = fields = None
+    for line in git(root, 'ls-files', '--debug').splitlines():
+        if not line.startswith(' '):
+            path, fields = line, {}
+            continue
+        for item in line.split('\t'):
+            name, _, value = item.strip().partition(': ')
+            fields[name] = value
+        if 'size' in fields:
+            seconds, nanoseconds = fields['mtime'].split(':')
+            entries[path] = (modes[path], int(seconds) * 1000000000 + int(nanoseconds),
+                             int(fields['ino']), int(fields['size']))
+    return entries
+
+
+@pytest.mark.parametrize('version', [2, 3, 4])
+def test_index_parser_matches_git(tmp_path, version):
+    root = str(tmp_path)
+    git(root, 'init', '-q')
+    git(root, 'config', 'core.quotepath', 'false')
+    for i in range(30):
+        # long shared prefixes exercise the path compression of version 4
+        write(root, f'src/package/module_{i:02d}/implementation.py', 'x = 1\n' * i)
+    write(root, 'README.md', '# test\n')
+    write(root, 'name with spaces.txt', 'a\n')
+    write(root, 'docs/été.md', 'b\n')
+    write(root, 'run.sh', 'echo\n')
+    os.chmod(os.path.join(root, 'run.sh'), 0o755)
+    os.symlink('README.md', os.path.join(root, 'link'))
+    git(root, 'add', '-A')
+    git(root, 'commit', '-q', '-m', 'init')
+    if version > 2:
+        # intent-to-add needs the extended flags of version 3
+        write(root, 'intent.txt', 'later\n')
+        git(root, 'add', '-N', 'intent.txt')
+    git(root, 'update-index', '--index-version', str(version))
+
+    index = read_index(os.path.join(git_dir(root), 'index'))
+    assert index is not None and index.version == version
+    expected = git_index_entries(root)
+    assert index.paths == sorted(expected, key=lambda path: path.encode())
+    for i, path in enumerate(index.paths):
+        assert (index.mode[i], index.mtime_ns[i], index.ino[i], index.size[i]) == expected[path], path
+    ambiguous = [path for i, path in enumerate(index.paths) if index.ambiguous[i]]
+    assert ambiguous == (['intent.txt'] if version > 2 else [])
+
+
+IGNORE_RULES = """\
+*.log
+!keep.log
+build/
+/top.txt
+docs/**/*.tmp
+[abc].bin
+logs/*
+!logs/readme
+# a comment
+\\#hash
+space\\ name
+"""
+FILES = ['a.log', 'keep.log', 'top.txt', 'src/top.txt', 'src/x.log', 'build/x', 'src/build/y',
+         'docs/z.tmp', 'docs/a/b/z.tmp', 'a.bin', 'd.bin', 'logs/readme', 'logs/other', '#hash',
+         'space name', 'src/keep.log', 'notes.txt']
+
+
+def test_ignore_matcher_matches_git(tmp_path):
+    root = str(tmp_path)
+    git(root, 'init', '-q')
+    write(root, '.gitignore', IGNORE_RULES)
+    write(root, 'src/.gitignore', '!x.log\n*.py\n')
+    write(root, '.git/info/exclude', 'notes.txt\n')
+    for rel in FILES + ['src/main.py']:
+        write(root, rel)
+    paths = FILES + ['src/main.py', 'build', 'src/build', 'logs', 'docs/a']
+    out = subprocess.run(['git', 'check-ignore', '--stdin', '-z'], cwd=root, input='\0'.join(paths),
+                         stdout=subprocess.PIPE, encoding='utf-8').stdout
+    expected = set(filter(None, out.split('\0')))
+    matcher = IgnoreMatcher(root)
+    ignored = {rel for rel in paths if matcher.is_ignored(rel, os.path.isdir(os.path.join(root, rel)))}
+    assert ignored == expected
+
+
+def test_untracked_mode_no_shows_new_files_on_first_snapshot(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    git(root, 'init', '-q')
+    write(root, 'tracked.txt', 'a\n')
+    write(root, 'sub/inner.txt', 'b\n')
+    git(root, 'add', '-A')
+    git(root, 'commit', '-q', '-m', 'init')
+    write(root, '.gitignore', '*.tmp\n')
+    write(root, 'new.txt', 'new\n')
+    write(root, 'scratch.tmp', 'ignored\n')
+    write(root, 'tracked.txt', 'changed\n')
+    monkeypatch.setattr(git_status, 'UNTRACKED_MODE', 'no')
+    invalidate_snapshot(root)
+    snapshot = cached_snapshot(root)
+    codes = {e.path: e.code for e in snapshot.entries}
+    assert codes == {'.gitignore': '??', 'new.txt': '??', 'tracked.txt': ' M'}
+    # the same answer from the cache
+    assert {e.path: e.code for e in cached_snapshot(root).entries} == codes
+    invalidate_snapshot(root)
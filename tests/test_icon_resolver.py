@@ -0,0 +1,37 @@
+"""
+Icon lookup by whole file name, multi-dot suffix and extension.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from icon_resolver import DEFAULT_ICON, icon_resolver  # noqa: E402
+
+
+@pytest.mark.parametrize('name, filetype', [
+    ('Makefile', 'gnu'),
+    ('LICENSE', 'license'),
+    ('COPYING', 'license'),
+    ('Gemfile', 'bundler'),
+    ('Procfile', 'procfile'),
+    ('Rakefile', 'rake'),
+    ('Earthfile', 'earthly'),
+    ('yarn.lock', 'yarn'),
+    ('.babelrc', 'babel2'),
+    ('main.py', 'python'),
+    ('MAIN.PY', 'python'),
+    ('vue.config.js', 'vueconfig'),
+    ('archive.tar.gz', 'zip2'),
+])
+def test_known_names(name, filetype):
+    assert icon_resolver.filetype(name) == filetype
+    assert icon_resolver.icon(name) == f'file_type_{filetype}.svg'
+
+
+@pytest.mark.parametrize('name', ['unknown_name', 'notes.unknownext', 'staged', 'modified', 'x.committed'])
+def test_unknown_names_get_the_default_icon(name):
+    assert icon_resolver.filetype(name) is None
+    assert icon_resolver.icon(name) == DEFAULT_ICON
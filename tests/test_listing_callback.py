@@ -0,0 +1,88 @@
+"""
+The listing callback keeps polling while a directory is scanned and stops
+once the scan is done, also when the finished scan shows the same page as
+the last poll (a budget-limited scan always does).
+"""
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import app  # noqa: E402
+import listing  # noqa: E402
+
+FILES = 50
+
+
+@pytest.fixture
+def client():
+    return app.server.test_client()
+
+
+@pytest.fixture
+def dependency(client):
+    deps = client.get('/_dash-dependencies').get_json()
+    return next(d for d in deps if 'listing_data.data' in d['output'] and 'scan_poll.disabled' in d['output'])
+
+
+def update(client, dependency, cwd, changed, n_intervals=None, page=None, sent_version=None):
+    """POST one run of list_cwd_files; returns (status code, outputs)."""
+    values = {('cwd', 'children'): cwd, ('scan_poll', 'n_intervals'): n_intervals,
+              ('page', 'data'): page, ('listing_version', 'data'): sent_version}
+    inputs = []
+    for item in dependency['inputs']:
+        if item['id'].startswith('{'):
+            inputs.append([])
+        else:
+            inputs.append({**item, 'value': values.get((item['id'], item['property']))})
+    state = [{**item, 'value': values.get((item['id'], item['property']))} for item in dependency['state']]
+    outputs = [dict(zip(('id', 'property'), output.split('.')))
+               for output in dependency['output'].strip('.').split('...')]
+    response = client.post('/_dash-update-component', json={
+        'output': dependency['output'], 'outputs': outputs, 'inputs': inputs, 'state': state,
+        'changedPropIds': [changed]})
+    if response.status_code != 200:
+        return response.status_code, None
+    return 200, response.get_json()['response']
+
+
+def test_scan_poll_stops_when_the_scan_is_done(tmp_path, monkeypatch, client, dependency):
+    for i in range(FILES):
+        (tmp_path / f'file{i:03d}.txt').write_text('x')
+    release = threading.Event()
+
+    class HeldListing(listing.Listing):
+        # the scan has read every entry it will read, but is not done yet
+        __slots__ = ()
+
+        def __init__(self, records=()):
+            release.wait(10)
+            super().__init__(records)
+
+    monkeypatch.setattr(listing, 'Listing', HeldListing)
+    monkeypatch.setattr(listing, 'SCAN_BUDGET_ENTRIES', FILES - 10)
+    monkeypatch.setattr(listing, 'FIRST_PAGE', FILES - 10)
+    cwd = str(tmp_path)
+    listing.invalidate_listing(cwd)
+
+    status, out = update(client, dependency, cwd, 'cwd.children')
+    assert status == 200
+    assert out['scan_poll']['disabled'] is False
+    page, version = out['page']['data'], out['listing_version']['data']
+
+    # nothing new while the scan is held: dropped
+    status, _ = update(client, dependency, cwd, 'scan_poll.n_intervals', 1, page, version)
+    assert status == 204
+
+    release.set()
+    scan = listing.current_scan(cwd)
+    scan.wait(FILES, 10)
+    assert scan.done and scan.partial
+    status, out = update(client, dependency, cwd, 'scan_poll.n_intervals', 2, page, version)
+    assert status == 200
+    assert out['scan_poll']['disabled'] is True
+    assert 'partial listing' in str(out['listing_info']['children'])
+    listing.invalidate_listing(cwd)